@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
+import os
 import sys
 sys.path.append('.')
-from pit_stop_strategy_engine import F1PitStopStrategyEngine, format_strategy_output
+from pit_stop_strategy_engine import F1PitStopStrategyEngine, format_strategy_output, TRACK_DATA_PATH
 import plotly.graph_objects as go
 import plotly.express as px
+from strategy_index import StrategyIndex, INDEX_PATH
 
 # Page config
 st.set_page_config(
@@ -89,7 +91,15 @@ st.sidebar.header("🏁 Race Configuration")
 # Basic race info
 st.sidebar.subheader("📊 Race Details")
 total_laps = st.sidebar.number_input("Total Race Laps", 50, 78, 58)
-circuit_name = st.sidebar.text_input("Circuit Name", "Monaco")
+circuits = sorted(pd.read_csv(TRACK_DATA_PATH)['Country']) if os.path.exists(TRACK_DATA_PATH) else []
+if circuits:
+    circuit_name = st.sidebar.selectbox(
+        "Circuit", circuits,
+        index=circuits.index("Monaco") if "Monaco" in circuits else 0,
+        help="Circuits from data/track_characteristics.csv - sets the base lap time"
+    )
+else:
+    circuit_name = st.sidebar.text_input("Circuit Name", "Monaco")
 
 # Weather conditions
 st.sidebar.subheader("🌤️ Weather Conditions")
@@ -111,19 +121,28 @@ tyre_severity = st.sidebar.select_slider(
 st.sidebar.markdown("---")
 generate_button = st.sidebar.button("🚀 Generate Strategy Options", use_container_width=True)
 
+@st.cache_resource
+def load_history_index():
+    """Load historical strategy index once (built with strategy_index.py)"""
+    return StrategyIndex.load(INDEX_PATH) if os.path.exists(INDEX_PATH) else None
+
 # Main content
 if generate_button:
     # Initialize engine
-    engine = F1PitStopStrategyEngine()
+    engine = F1PitStopStrategyEngine(history_index=load_history_index())
+    if engine.resolve_circuit(circuit_name) is None:
+        st.warning(f"⚠️ '{circuit_name}' is not in track_characteristics.csv - "
+                   f"using a generic {engine.default_base_lap_time:.0f}s base lap time")
     
     # Generate strategies
     with st.spinner("🔄 Calculating optimal pit stop strategies..."):
-        strategies = engine.generate_strategies(
+        strategies, historical = engine.generate_strategies_with_history(
             total_race_laps=total_laps,
             track_temp=track_temp,
             air_temp=air_temp,
             tyre_severity=tyre_severity,
-            rainfall=rainfall
+            rainfall=rainfall,
+            circuit=circuit_name
         )
     
     # Display race info summary
@@ -303,6 +322,22 @@ if generate_button:
         
         df = pd.DataFrame(comparison_data)
         st.dataframe(df, use_container_width=True)
+    
+    # Historical strategies in similar conditions
+    if historical:
+        st.markdown("## 📚 What Teams Actually Did in Similar Conditions")
+        
+        history_data = {
+            'Race': [f"{h.year} {h.event_name}" for h in historical],
+            'Driver': [h.driver for h in historical],
+            'Position': [h.position or '-' for h in historical],
+            'Pit Stops': [h.total_pit_stops for h in historical],
+            'Compounds Used': [' → '.join(h.compounds) for h in historical],
+            'Pit Laps': [', '.join(str(lap) for lap in h.pit_laps) or '-' for h in historical],
+            'Conditions': [f"{h.total_laps} laps | Track {h.track_temp:.0f}°C | Air {h.air_temp:.0f}°C" for h in historical]
+        }
+        
+        st.dataframe(pd.DataFrame(history_data), use_container_width=True)
 
 else:
     # Welcome screen
@@ -0,0 +1,210 @@
+"""
+F1 Strategy Backtest
+Replay setiap race historis ke strategy engine dan bandingkan rekomendasi dengan strategi aktual
+(pemenang dan seluruh field), diagregasi per circuit dan per season
+"""
+
+import os
+import hashlib
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from pit_stop_strategy_engine import F1PitStopStrategyEngine
+from race_history import load_lap_data, extract_race_strategies, RACE_KEYS, LAP_DATA_PATH, TRACK_DATA_PATH
+
+CACHE_DIR = 'data/cache/backtest'
+CACHE_VERSION = 2  # Naikkan jika isi race inputs berubah (cache lama tidak dipakai lagi)
+
+METRIC_COLUMNS = [
+    'abs_stop_error', 'start_compound_match', 'compound_set_match', 'winner_stops_covered',
+    'pit_lap_mae', 'field_stop_share', 'field_pit_lap_mae', 'race_time_pct_error',
+    'field_median_time_pct_error', 'field_time_percentile'
+]
+
+
+def _inputs_digest(paths: List[str]) -> str:
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def prepare_race_inputs(lap_data_path: str = LAP_DATA_PATH,
+                        track_data_path: str = TRACK_DATA_PATH,
+                        cache_dir: str = CACHE_DIR) -> List[Dict]:
+    """
+    Kondisi yang dilihat engine + strategi aktual finisher untuk setiap race
+
+    Race tanpa finisher dengan lap time di setiap lap dilewati, karena pemenang
+    dan race time pembandingnya tidak bisa ditentukan.
+    Hasil di-cache per isi lap data dan track data, jadi backtest berikutnya
+    (mis. setelah ubah parameter engine) tidak perlu membaca CSV lagi.
+    """
+    digest = _inputs_digest([lap_data_path, track_data_path])
+    cache_path = os.path.join(cache_dir, f"races_v{CACHE_VERSION}_{digest}.pkl")
+    if os.path.exists(cache_path):
+        return joblib.load(cache_path)
+
+    strategies = extract_race_strategies(load_lap_data(lap_data_path, track_data_path))
+    finishers = strategies[strategies['Finished']].dropna(subset=['TrackTemp', 'AirTemp'])
+
+    races = []
+    for (year, round_num), field in finishers.groupby(RACE_KEYS):
+        if not field['Timed'].any():
+            continue
+        field = field.sort_values('Position')  # Finisher tanpa Position (tidak Timed) di akhir
+        first = field.iloc[0]
+        races.append({
+            'year': int(year),
+            'round': int(round_num),
+            'event_name': first['EventName'],
+            'country': first['Country'],
+            'total_laps': int(first['TotalLaps']),
+            'track_temp': float(field['TrackTemp'].mean()),
+            'air_temp': float(field['AirTemp'].mean()),
+            'tyre_severity': first['TyreSeverity'],
+            'rainfall': bool(field['Rainfall'].any()),
+            'field': [
+                {
+                    'driver': row.Driver,
+                    'position': None if pd.isna(row.Position) else int(row.Position),
+                    'compounds': list(row.Compounds),
+                    'pit_laps': list(row.PitLaps),
+                    'race_time': float(row.RaceTime) if row.Timed else None
+                }
+                for row in field.itertuples(index=False)
+            ]
+        })
+
+    os.makedirs(cache_dir, exist_ok=True)
+    joblib.dump(races, cache_path)
+    return races
+
+
+def _pit_lap_mae(predicted: List[int], actual: List[int]) -> float:
+    """Mean absolute error lap pit stop; NaN jika jumlah stop berbeda"""
+    if len(predicted) != len(actual):
+        return np.nan
+    if not predicted:
+        return 0.0
+    return float(np.mean(np.abs(np.array(predicted) - np.array(actual))))
+
+
+_engine = None
+
+
+def _init_worker():
+    global _engine
+    _engine = F1PitStopStrategyEngine()
+
+
+def score_race(race: Dict, engine: Optional[F1PitStopStrategyEngine] = None) -> Dict:
+    """Jalankan engine untuk satu race dan skor rekomendasi teratas terhadap hasil aktual"""
+    engine = engine or _engine or F1PitStopStrategyEngine()
+    strategies = engine.generate_strategies(
+        total_race_laps=race['total_laps'],
+        track_temp=race['track_temp'],
+        air_temp=race['air_temp'],
+        tyre_severity=race['tyre_severity'],
+        rainfall=race['rainfall'],
+        circuit=race['country']
+    )
+
+    result = {
+        'year': race['year'],
+        'round': race['round'],
+        'event_name': race['event_name'],
+        'country': race['country'],
+        'n_strategies': len(strategies)
+    }
+    if not strategies:
+        return result
+
+    top = strategies[0]
+    compounds = [stint.compound for stint in top.stint_plans]
+    pit_laps = [stint.pit_after_lap for stint in top.stint_plans if stint.pit_after_lap > 0]
+
+    winner = race['field'][0]  # Finisher Timed tercepat (prepare_race_inputs)
+    winner_stops = len(winner['pit_laps'])
+    same_stops = [d for d in race['field'] if len(d['pit_laps']) == top.total_pit_stops]
+    field_times = np.array([d['race_time'] for d in race['field'] if d['race_time'] is not None])
+    median_time = float(np.median(field_times))
+
+    result.update({
+        'recommended': ' → '.join(compounds),
+        'winner_strategy': ' → '.join(winner['compounds']),
+        'stop_error': top.total_pit_stops - winner_stops,
+        'abs_stop_error': abs(top.total_pit_stops - winner_stops),
+        'start_compound_match': float(compounds[0] == winner['compounds'][0]),
+        'compound_set_match': float(set(compounds) == set(winner['compounds'])),
+        'winner_stops_covered': float(any(s.total_pit_stops == winner_stops for s in strategies)),
+        'pit_lap_mae': _pit_lap_mae(pit_laps, winner['pit_laps']),
+        'field_stop_share': len(same_stops) / len(race['field']),
+        'field_pit_lap_mae': (np.mean([_pit_lap_mae(pit_laps, d['pit_laps']) for d in same_stops])
+                              if same_stops else np.nan),
+        'race_time_pct_error': (top.estimated_race_time - winner['race_time']) / winner['race_time'] * 100,
+        # Relatif ke finisher yang Timed: error terhadap median dan % finisher yang lebih cepat dari estimasi
+        'field_median_time_pct_error': (top.estimated_race_time - median_time) / median_time * 100,
+        'field_time_percentile': float(np.mean(field_times < top.estimated_race_time) * 100)
+    })
+    return result
+
+
+def run_backtest(lap_data_path: str = LAP_DATA_PATH,
+                 track_data_path: str = TRACK_DATA_PATH,
+                 cache_dir: str = CACHE_DIR,
+                 max_workers: Optional[int] = None) -> pd.DataFrame:
+    """Backtest semua race historis secara paralel; returns satu baris per race"""
+    races = prepare_race_inputs(lap_data_path, track_data_path, cache_dir)
+
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(races) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        results = list(pool.map(score_race, races, chunksize=chunksize))
+
+    return pd.DataFrame(results)
+
+
+def summarize(results: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Agregasi metrik error per circuit, per season dan keseluruhan"""
+    metrics = results.reindex(columns=METRIC_COLUMNS)
+    by_circuit = metrics.groupby(results['country']).mean()
+    by_circuit.insert(0, 'races', results.groupby('country').size())
+    by_season = metrics.groupby(results['year']).mean()
+    by_season.insert(0, 'races', results.groupby('year').size())
+    return {
+        'circuit': by_circuit,
+        'season': by_season,
+        'overall': metrics.mean().to_frame('mean').T
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest strategy engine against historical races")
+    parser.add_argument('--laps', default=LAP_DATA_PATH)
+    parser.add_argument('--tracks', default=TRACK_DATA_PATH)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None, help="Optional CSV path for per-race results")
+    args = parser.parse_args()
+
+    results = run_backtest(args.laps, args.tracks, args.cache_dir, args.workers)
+    summary = summarize(results)
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+    print("\n" + "="*80)
+    print(f"BACKTEST: {len(results)} races")
+    print("="*80)
+    print(summary['overall'].round(3).to_string(index=False))
+    print("\nPer Season:")
+    print(summary['season'].round(3).to_string())
+    print("\nPer Circuit:")
+    print(summary['circuit'].round(3).to_string())
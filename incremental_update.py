@@ -0,0 +1,362 @@
+"""
+F1 Tyre Model Incremental Update
+Update model XGBoost secara warm-start dari partisi race baru saja (tanpa retrain penuh),
+dengan artifact ber-versi, validasi sebelum promote, dan pointer rollback
+"""
+
+import os
+import json
+import copy
+import shutil
+import argparse
+import pandas as pd
+import numpy as np
+import joblib
+import xgboost as xgb
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from sklearn.metrics import accuracy_score
+from xgboost import XGBClassifier
+from typing import List, Optional
+
+MODEL_DIR = 'model'
+VERSIONS_DIRNAME = 'versions'
+REGISTRY_FILENAME = 'registry.json'
+
+ARTIFACTS = ['tyre_recommender.pkl', 'scaler.pkl', 'label_encoder.pkl', 'feature_columns.pkl']
+
+N_NEW_ROUNDS = 20            # Boosting rounds ditambahkan per update
+VALIDATION_FRACTION = 0.2    # Porsi lap terakhir partisi baru yang di-hold out sebagai validation window
+TIME_KEYS = ['Year', 'Round', 'LapNumber']  # Urutan waktu partisi (race_features.py menyimpan Year/Round)
+ACCURACY_TOLERANCE = 0.005   # Kandidat boleh turun maksimal segini dari model aktif
+
+
+@dataclass
+class UpdateResult:
+    """Hasil satu incremental update"""
+    version: str
+    parent_version: str
+    promoted: bool
+    n_train_samples: int
+    n_validation_samples: int
+    baseline_accuracy: float   # Model aktif di validation window
+    candidate_accuracy: float  # Model kandidat di validation window
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+def _versions_dir(model_dir: str) -> str:
+    return os.path.join(model_dir, VERSIONS_DIRNAME)
+
+
+def _registry_path(model_dir: str) -> str:
+    return os.path.join(_versions_dir(model_dir), REGISTRY_FILENAME)
+
+
+def _write_registry(model_dir: str, registry: dict):
+    path = _registry_path(model_dir)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_registry(model_dir: str = MODEL_DIR) -> dict:
+    """
+    Load registry versi model
+
+    Jika belum ada, artifact yang sekarang ada di model_dir disimpan sebagai v001
+    """
+    path = _registry_path(model_dir)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    version_dir = os.path.join(_versions_dir(model_dir), 'v001')
+    os.makedirs(version_dir, exist_ok=True)
+    for name in ARTIFACTS:
+        shutil.copy2(os.path.join(model_dir, name), os.path.join(version_dir, name))
+
+    registry = {
+        'current': 'v001',
+        'previous': None,
+        'versions': {
+            'v001': {'parent': None, 'created': _now(), 'status': 'promoted'}
+        }
+    }
+    _write_registry(model_dir, registry)
+    return registry
+
+
+def register_artifacts(model_dir: str = MODEL_DIR, source: str = 'full retrain') -> str:
+    """
+    Daftarkan artifact yang sekarang ada di model_dir (mis. hasil train_model.py) sebagai versi aktif
+
+    Tanpa ini, update berikutnya akan warm-start dari versi lama di registry, bukan dari hasil retrain.
+    Returns nama versi yang aktif
+    """
+    if not os.path.exists(_registry_path(model_dir)):
+        return load_registry(model_dir)['current']
+
+    registry = load_registry(model_dir)
+    version = _next_version(registry)
+    version_dir = os.path.join(_versions_dir(model_dir), version)
+    os.makedirs(version_dir, exist_ok=True)
+    for name in ARTIFACTS:
+        shutil.copy2(os.path.join(model_dir, name), os.path.join(version_dir, name))
+
+    registry['versions'][version] = {
+        'parent': registry['current'], 'created': _now(), 'status': 'promoted', 'source': source
+    }
+    registry['previous'] = registry['current']
+    registry['current'] = version
+    _write_registry(model_dir, registry)
+    return version
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def _next_version(registry: dict) -> str:
+    return f"v{max(int(v[1:]) for v in registry['versions']) + 1:03d}"
+
+
+def _load_version(model_dir: str, version: str) -> dict:
+    version_dir = os.path.join(_versions_dir(model_dir), version)
+    return {name: joblib.load(os.path.join(version_dir, name)) for name in ARTIFACTS}
+
+
+def _activate(model_dir: str, version: str):
+    """Copy artifact versi ke model_dir (lokasi yang dibaca app/notebook)"""
+    version_dir = os.path.join(_versions_dir(model_dir), version)
+    for name in ARTIFACTS:
+        tmp_path = os.path.join(model_dir, name + '.tmp')
+        shutil.copy2(os.path.join(version_dir, name), tmp_path)
+        os.replace(tmp_path, os.path.join(model_dir, name))
+
+
+def promote(version: str, model_dir: str = MODEL_DIR):
+    """Jadikan version sebagai model aktif; versi sebelumnya menjadi pointer rollback"""
+    registry = load_registry(model_dir)
+    if version not in registry['versions']:
+        raise ValueError(f"Unknown model version: {version}")
+
+    _activate(model_dir, version)
+    registry['previous'] = registry['current']
+    registry['current'] = version
+    registry['versions'][version]['status'] = 'promoted'
+    _write_registry(model_dir, registry)
+
+
+def rollback(model_dir: str = MODEL_DIR) -> str:
+    """Kembalikan model aktif ke pointer rollback; returns versi yang aktif sekarang"""
+    registry = load_registry(model_dir)
+    previous = registry['previous']
+    if previous is None:
+        raise ValueError("No previous model version to roll back to")
+
+    _activate(model_dir, previous)
+    registry['versions'][registry['current']]['status'] = 'rolled_back'
+    registry['current'] = previous
+    registry['previous'] = registry['versions'][previous]['parent']
+    _write_registry(model_dir, registry)
+    return previous
+
+
+# ---------------------------------------------------------------------------
+# Warm-start update
+# ---------------------------------------------------------------------------
+
+def update_scaler(scaler, X_new: pd.DataFrame):
+    """Update running mean/variance StandardScaler dengan data baru saja"""
+    new_scaler = copy.deepcopy(scaler)
+    new_scaler.partial_fit(X_new)
+    return new_scaler
+
+
+def rescale_booster(booster: xgb.Booster, old_scaler, new_scaler) -> xgb.Booster:
+    """
+    Pindahkan split threshold tree lama ke skala scaler baru
+
+    Tree lama di-train pada (x - mean_lama) / scale_lama; tanpa ini, update scaler
+    akan menggeser semua split dan merusak model yang sudah ada.
+    """
+    config = json.loads(booster.save_raw(raw_format='json'))
+    old_mean, old_scale = old_scaler.mean_, old_scaler.scale_
+    new_mean, new_scale = new_scaler.mean_, new_scaler.scale_
+
+    for tree in config['learner']['gradient_booster']['model']['trees']:
+        conditions = tree['split_conditions']
+        for node, (left, feature) in enumerate(zip(tree['left_children'], tree['split_indices'])):
+            if left == -1:
+                continue  # Leaf node: split_conditions berisi leaf value
+            raw_threshold = conditions[node] * old_scale[feature] + old_mean[feature]
+            conditions[node] = float((raw_threshold - new_mean[feature]) / new_scale[feature])
+
+    rescaled = xgb.Booster()
+    rescaled.load_model(bytearray(json.dumps(config).encode()))
+    return rescaled
+
+
+def _load_partitions(paths: List[str], feature_columns: List[str]) -> pd.DataFrame:
+    frames = [pd.read_csv(path) for path in paths]
+    df = pd.concat(frames, ignore_index=True)
+    missing = [col for col in feature_columns + ['Compound'] if col not in df.columns]
+    if missing:
+        raise ValueError(f"New partition is missing columns: {missing}")
+    return df
+
+
+def split_validation_window(df: pd.DataFrame, validation_fraction: float = VALIDATION_FRACTION):
+    """
+    Hold out lap terakhir (Year, Round, LapNumber) sebagai validation window
+
+    Lap yang sama tidak pernah terbelah antara train dan validation. Partisi tanpa Year/Round
+    dianggap satu race, jadi hanya diurutkan berdasarkan LapNumber.
+    Returns (train_df, val_df)
+    """
+    keys = [key for key in TIME_KEYS if key in df.columns]
+    step = df.groupby(keys, sort=True).ngroup()
+    cutoff = np.sort(step.to_numpy())[int(len(df) * (1 - validation_fraction))]
+    return df[step < cutoff], df[step >= cutoff]
+
+
+def incremental_update(new_data_paths: List[str],
+                       model_dir: str = MODEL_DIR,
+                       n_rounds: int = N_NEW_ROUNDS,
+                       validation_fraction: float = VALIDATION_FRACTION,
+                       validation_data_paths: Optional[List[str]] = None,
+                       tolerance: float = ACCURACY_TOLERANCE,
+                       auto_promote: bool = True) -> UpdateResult:
+    """
+    Tambah boosting rounds ke model aktif memakai partisi baru saja
+
+    Validation window: validation_data_paths jika diberikan, selain itu lap terakhir
+    (validation_fraction dari baris) partisi baru menurut Year/Round/LapNumber.
+    Kandidat selalu disimpan sebagai versi baru, tapi hanya di-promote jika
+    akurasinya di validation window tidak turun lebih dari tolerance.
+    """
+    registry = load_registry(model_dir)
+    parent = registry['current']
+    current = _load_version(model_dir, parent)
+
+    model = current['tyre_recommender.pkl']
+    if not isinstance(model, XGBClassifier):
+        raise TypeError(f"Warm-start update requires an XGBoost model, got {type(model).__name__}; "
+                        f"retrain with train_model.py (deploys XGBoost) first")
+
+    feature_columns = current['feature_columns.pkl']
+    le_compound = current['label_encoder.pkl']
+    old_scaler = current['scaler.pkl']
+
+    df = _load_partitions(new_data_paths, feature_columns)
+    if validation_data_paths:
+        train_df = df
+        val_df = _load_partitions(validation_data_paths, feature_columns)
+    else:
+        train_df, val_df = split_validation_window(df, validation_fraction)
+    if len(train_df) == 0 or len(val_df) == 0:
+        raise ValueError("Not enough new samples for both training and validation")
+
+    unknown = set(df['Compound']) - set(le_compound.classes_)
+    if unknown:
+        raise ValueError(f"Unknown compounds in new data: {sorted(unknown)}")
+
+    # DataFrame (bukan array) karena scaler di-fit dengan nama kolom
+    X_train = train_df[feature_columns].astype(float)
+    y_train = le_compound.transform(train_df['Compound'])
+    X_val = val_df[feature_columns].astype(float)
+    y_val = le_compound.transform(val_df['Compound'])
+
+    # Scaler & booster baru - biaya hanya bergantung pada data baru + ukuran model
+    new_scaler = update_scaler(old_scaler, X_train)
+    booster = model.get_booster()
+    if 'best_iteration' in booster.attributes():
+        # Buang tree setelah best iteration early stopping sebelum menambah rounds
+        booster = booster[:model.best_iteration + 1]
+    booster = rescale_booster(booster, old_scaler, new_scaler)
+
+    # xgb.train langsung: partisi baru boleh tidak memuat semua class (mis. race kering)
+    params = {k: v for k, v in model.get_xgb_params().items() if v is not None}
+    params['num_class'] = len(le_compound.classes_)
+    booster = xgb.train(
+        params,
+        xgb.DMatrix(new_scaler.transform(X_train), label=y_train),
+        num_boost_round=n_rounds,
+        xgb_model=booster
+    )
+    # Hapus best_iteration dari early stopping lama supaya predict memakai semua tree
+    booster.set_attr(best_iteration=None, best_score=None)
+
+    candidate = copy.deepcopy(model)
+    candidate._Booster = booster
+    candidate.set_params(n_estimators=booster.num_boosted_rounds(), early_stopping_rounds=None)
+
+    baseline_accuracy = accuracy_score(y_val, model.predict(old_scaler.transform(X_val)))
+    candidate_accuracy = accuracy_score(y_val, candidate.predict(new_scaler.transform(X_val)))
+
+    version = _next_version(registry)
+    version_dir = os.path.join(_versions_dir(model_dir), version)
+    os.makedirs(version_dir, exist_ok=True)
+    joblib.dump(candidate, os.path.join(version_dir, 'tyre_recommender.pkl'))
+    joblib.dump(new_scaler, os.path.join(version_dir, 'scaler.pkl'))
+    joblib.dump(le_compound, os.path.join(version_dir, 'label_encoder.pkl'))
+    joblib.dump(feature_columns, os.path.join(version_dir, 'feature_columns.pkl'))
+
+    passed = candidate_accuracy >= baseline_accuracy - tolerance
+    registry['versions'][version] = {
+        'parent': parent,
+        'created': _now(),
+        'status': 'validated' if passed else 'rejected',
+        'n_train_samples': len(train_df),
+        'n_validation_samples': len(val_df),
+        'baseline_accuracy': baseline_accuracy,
+        'candidate_accuracy': candidate_accuracy,
+        'sources': list(new_data_paths)
+    }
+    _write_registry(model_dir, registry)
+
+    promoted = passed and auto_promote
+    if promoted:
+        promote(version, model_dir)
+
+    return UpdateResult(
+        version=version,
+        parent_version=parent,
+        promoted=promoted,
+        n_train_samples=len(train_df),
+        n_validation_samples=len(val_df),
+        baseline_accuracy=baseline_accuracy,
+        candidate_accuracy=candidate_accuracy
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-start update of the tyre model")
+    parser.add_argument('new_data', nargs='*', help="Feature CSV(s) for the new race(s), built with race_features.py")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--rounds', type=int, default=N_NEW_ROUNDS)
+    parser.add_argument('--validation-data', nargs='*', default=None)
+    parser.add_argument('--no-promote', action='store_true')
+    parser.add_argument('--rollback', action='store_true')
+    args = parser.parse_args()
+
+    if args.rollback:
+        print(f"✓ Rolled back to {rollback(args.model_dir)}")
+    elif not args.new_data:
+        parser.error("new_data is required unless --rollback is given")
+    else:
+        result = incremental_update(
+            args.new_data,
+            model_dir=args.model_dir,
+            n_rounds=args.rounds,
+            validation_data_paths=args.validation_data,
+            auto_promote=not args.no_promote
+        )
+        print(f"Candidate {result.version} (parent {result.parent_version})")
+        print(f"  Train samples: {result.n_train_samples:,} | Validation samples: {result.n_validation_samples:,}")
+        print(f"  Validation accuracy: {result.baseline_accuracy:.4f} → {result.candidate_accuracy:.4f}")
+        print(f"  {'✓ Promoted' if result.promoted else '✗ Not promoted'}")
@@ -0,0 +1,575 @@
+"""
+F1 Live Lap Feed
+Pipeline asyncio untuk timing & weather lap-by-lap: state stint per driver (umur ban, estimasi degradasi),
+strategy engine & model hanya dipanggil ulang jika kondisi berubah signifikan
+"""
+
+import math
+import time
+import json
+import dataclasses
+import asyncio
+import argparse
+import statistics
+import joblib
+import numpy as np
+import pandas as pd
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+from pit_stop_strategy_engine import F1PitStopStrategyEngine, PitStopStrategy, TRACK_DATA_PATH
+from race_features import TRACK_TYPE_CODES, SEVERITY_CODES, STINT_PHASE_CODES
+
+QUEUE_SIZE = 64
+MIN_FIT_LAPS = 5               # Lap minimal di stint sebelum slope degradasi dipakai
+TEMP_THRESHOLD = 2.0           # °C perubahan suhu yang dianggap material
+# Perubahan degradasi yang dianggap material: minimal 0.1 s/lap (~2 s selama stint 20 lap)
+# dan minimal NOISE_SIGMAS standard error slope, supaya noise lap time tidak memicu model
+DEGRADATION_THRESHOLD = 0.1
+NOISE_SIGMAS = 2.0
+MAX_LAP_TIME = 200.0           # Lap lebih lambat (mis. red flag) dibuang, sama seperti collect_data.ipynb
+
+
+@dataclass
+class LapRecord:
+    """Satu lap dari feed (format kolom sama dengan data/f1_tyre_data.csv)"""
+    driver: str
+    lap_number: int
+    compound: str
+    stint: int
+    tyre_life: int
+    lap_time: float
+    air_temp: float
+    track_temp: float
+    humidity: float
+    rainfall: bool
+    received_at: float = 0.0  # perf_counter saat masuk pipeline
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LapRecord':
+        return cls(
+            driver=str(data['Driver']),
+            lap_number=int(data['LapNumber']),
+            compound=str(data['Compound']),
+            stint=int(data['Stint']),
+            tyre_life=int(data['TyreLife']),
+            lap_time=float(data['LapTime']),
+            air_temp=float(data['AirTemp']),
+            track_temp=float(data['TrackTemp']),
+            humidity=float(data['Humidity']),
+            rainfall=str(data['Rainfall']).lower() in ('true', '1'),
+        )
+
+
+@dataclass
+class DegradationFit:
+    """Least-squares lap time terhadap TyreLife atas seluruh stint, dari running sums (O(1) per lap)"""
+    n: int = 0
+    origin: float = 0.0  # Lap time pertama; y disimpan relatif ke sini supaya sums tidak kehilangan presisi
+    sx: float = 0.0
+    sy: float = 0.0
+    sxx: float = 0.0
+    sxy: float = 0.0
+    syy: float = 0.0
+
+    def add(self, tyre_life: float, lap_time: float):
+        if self.n == 0:
+            self.origin = lap_time
+        y = lap_time - self.origin
+        self.n += 1
+        self.sx += tyre_life
+        self.sy += y
+        self.sxx += tyre_life * tyre_life
+        self.sxy += tyre_life * y
+        self.syy += y * y
+
+    def estimate(self):
+        """Returns (slope s/lap, standard error slope); (0, 0) jika belum cukup lap"""
+        if self.n < 3:
+            return 0.0, 0.0
+        sxx = self.sxx - self.sx * self.sx / self.n
+        if sxx <= 0:
+            return 0.0, 0.0
+        sxy = self.sxy - self.sx * self.sy / self.n
+        syy = self.syy - self.sy * self.sy / self.n
+        slope = sxy / sxx
+        residual = max(syy - slope * sxy, 0.0)
+        return slope, math.sqrt(residual / (self.n - 2) / sxx)
+
+
+@dataclass
+class DriverStintState:
+    """State stint berjalan untuk satu driver"""
+    driver: str
+    stint: int
+    compound: str
+    tyre_age: int
+    lap_number: int
+    fit: DegradationFit = field(default_factory=DegradationFit)
+    degradation: float = 0.0            # Slope lap time sepanjang stint (s/lap), hanya untuk deteksi perubahan
+    degradation_stderr: float = 0.0
+    first_lap_time: Optional[float] = None
+    tyre_degradation: float = 0.0       # (LapTime - lap pertama stint) / TyreLife, definisi build_features
+    management_score: float = 1.0       # 1 / (1 + std LapTime driver di compound ini), definisi build_features
+
+
+@dataclass
+class LapTimeStats:
+    """Running mean/variance (Welford) lap time satu driver di satu compound"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, lap_time: float):
+        self.count += 1
+        delta = lap_time - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (lap_time - self.mean)
+
+    @property
+    def std(self) -> float:
+        # ddof=1 seperti pandas std di build_features; belum terdefinisi untuk < 2 lap
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+@dataclass
+class RaceConditions:
+    """Kondisi race yang dipakai strategy engine"""
+    total_race_laps: int
+    track_temp: float
+    air_temp: float
+    humidity: float
+    tyre_severity: str
+    rainfall: bool
+
+
+@dataclass
+class StrategyUpdate:
+    """Output pipeline: strategi baru (kondisi berubah) atau rekomendasi compound per driver"""
+    kind: str  # "conditions" atau "driver"
+    lap_number: int
+    conditions: RaceConditions
+    strategies: List[PitStopStrategy] = field(default_factory=list)
+    driver_state: Optional[DriverStintState] = None
+    recommended_compound: Optional[str] = None
+    compound_confidence: float = 0.0
+    latency: float = 0.0  # Seconds sejak lap diterima
+
+
+class StageMetrics:
+    """Latency per stage (seconds) dari sample terakhir"""
+
+    def __init__(self, name: str, max_samples: int = 2048):
+        self.name = name
+        self.count = 0
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {'count': self.count, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean_ms': statistics.fmean(ordered) * 1000,
+            'p95_ms': ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+            'max_ms': ordered[-1] * 1000
+        }
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+def load_replay_race(path: str,
+                     year: Optional[int] = None,
+                     round_num: Optional[int] = None) -> pd.DataFrame:
+    """Lap data satu race dari CSV (race pertama jika filter tidak menyisakan satu race)"""
+    df = pd.read_csv(path)
+    if year is not None:
+        df = df[df['Year'] == year]
+    if round_num is not None:
+        df = df[df['Round'] == round_num]
+    if 'Year' in df.columns and df[['Year', 'Round']].drop_duplicates().shape[0] > 1:
+        first = df.iloc[0]
+        df = df[(df['Year'] == first['Year']) & (df['Round'] == first['Round'])]
+    return df
+
+
+async def replay_file(path: str,
+                      speed: Optional[float] = 50.0,
+                      year: Optional[int] = None,
+                      round_num: Optional[int] = None) -> AsyncIterator[Dict]:
+    """
+    Replay satu race dari CSV lap data sebagai feed
+
+    Waktu emit tiap lap = kumulatif LapTime driver tersebut / speed.
+    speed=None mengirim secepat mungkin (untuk uji kapasitas).
+    """
+    df = load_replay_race(path, year, round_num)
+    df = df.sort_values(['Driver', 'LapNumber'])
+    df['_emit_at'] = df.groupby('Driver')['LapTime'].cumsum()
+    df = df.sort_values('_emit_at')
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for row in df.to_dict('records'):
+        if speed:
+            delay = start + row['_emit_at'] / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield row
+
+
+async def socket_feed(host: str, port: int) -> AsyncIterator[Dict]:
+    """Feed JSON-lines dari TCP socket (satu lap per baris)"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            yield json.loads(line)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def serve_replay(path: str, host: str = '127.0.0.1', port: int = 8765,
+                       speed: Optional[float] = 50.0) -> asyncio.AbstractServer:
+    """Stand-in timing server: kirim replay_file sebagai JSON lines ke setiap client"""
+    async def handle(reader, writer):
+        async for row in replay_file(path, speed):
+            writer.write((json.dumps(row, default=str) + '\n').encode())
+            await writer.drain()  # Backpressure ke sisi server
+        writer.close()
+        await writer.wait_closed()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+# ---------------------------------------------------------------------------
+# Model
+# ---------------------------------------------------------------------------
+
+def load_track(circuit: Optional[str], track_data_path: str = TRACK_DATA_PATH) -> Dict:
+    """Karakteristik track dari CSV; circuit tidak dikenal memakai default build_features"""
+    tracks = pd.read_csv(track_data_path).set_index('Country')
+    if circuit in tracks.index:
+        return tracks.loc[circuit].to_dict()
+    return {'TrackType': 'permanent', 'TyreSeverity': 'medium',
+            'TotalCorners': tracks['TotalCorners'].median(),
+            'TrackLength': tracks['TrackLength'].median()}
+
+
+class LiveCompoundModel:
+    """Wrapper model tyre_recommender untuk feature vector dari state live"""
+
+    def __init__(self, model, scaler, label_encoder, feature_columns: List[str], track: Dict):
+        self.model = model
+        self.scaler = scaler
+        self.label_encoder = label_encoder
+        self.feature_columns = feature_columns
+        self.track = track
+
+    @classmethod
+    def load(cls, circuit: str, model_dir: str = 'model',
+             track_data_path: str = TRACK_DATA_PATH) -> 'LiveCompoundModel':
+        return cls(
+            joblib.load(f'{model_dir}/tyre_recommender.pkl'),
+            joblib.load(f'{model_dir}/scaler.pkl'),
+            joblib.load(f'{model_dir}/label_encoder.pkl'),
+            joblib.load(f'{model_dir}/feature_columns.pkl'),
+            load_track(circuit, track_data_path)
+        )
+
+    def _features(self, state: DriverStintState, conditions: RaceConditions) -> Dict[str, float]:
+        if state.tyre_age <= 5:
+            phase = 'early'
+        elif state.tyre_age <= 15:
+            phase = 'middle'
+        else:
+            phase = 'late'
+
+        if state.compound == 'SOFT':
+            temp_compound_score = 30 - conditions.track_temp
+        elif state.compound == 'HARD':
+            temp_compound_score = conditions.track_temp - 30
+        else:
+            temp_compound_score = 0
+
+        return {
+            'AirTemp': conditions.air_temp,
+            'TrackTemp': conditions.track_temp,
+            'Humidity': conditions.humidity,
+            'Rainfall_Binary': int(conditions.rainfall),
+            'TrackType_Encoded': TRACK_TYPE_CODES.get(self.track['TrackType'], 1),
+            'TyreSeverity_Encoded': SEVERITY_CODES.get(self.track['TyreSeverity'], 2),
+            'TotalCorners': self.track['TotalCorners'],
+            'TrackLength': self.track['TrackLength'],
+            'LapNumber': state.lap_number,
+            'RaceProgress': state.lap_number / conditions.total_race_laps,
+            'Stint': state.stint,
+            'TyreLife': state.tyre_age,
+            'StintPhase_Encoded': STINT_PHASE_CODES[phase],
+            'TyreManagementScore': state.management_score,
+            'TyreDegradation': state.tyre_degradation,
+            'TempCompoundScore': temp_compound_score
+        }
+
+    def predict(self, state: DriverStintState, conditions: RaceConditions):
+        features = pd.DataFrame([self._features(state, conditions)])[self.feature_columns]
+        probabilities = self.model.predict_proba(self.scaler.transform(features))[0]
+        best = int(np.argmax(probabilities))
+        return self.label_encoder.inverse_transform([best])[0], float(probabilities[best])
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+class LiveStrategyPipeline:
+    """
+    ingest -> stint tracker -> recommender, dihubungkan bounded asyncio.Queue
+
+    Queue penuh membuat stage sebelumnya menunggu (backpressure) sampai ke source.
+    """
+
+    _DONE = object()
+
+    def __init__(self,
+                 total_race_laps: int,
+                 tyre_severity: str,
+                 engine: Optional[F1PitStopStrategyEngine] = None,
+                 model: Optional[LiveCompoundModel] = None,
+                 circuit: Optional[str] = None,
+                 queue_size: int = QUEUE_SIZE,
+                 min_fit_laps: int = MIN_FIT_LAPS,
+                 temp_threshold: float = TEMP_THRESHOLD,
+                 degradation_threshold: float = DEGRADATION_THRESHOLD,
+                 noise_sigmas: float = NOISE_SIGMAS):
+        self.total_race_laps = total_race_laps
+        self.tyre_severity = tyre_severity
+        self.engine = engine or F1PitStopStrategyEngine()
+        self.model = model
+        self.circuit = circuit
+        self.queue_size = queue_size
+        self.min_fit_laps = min_fit_laps
+        self.temp_threshold = temp_threshold
+        self.degradation_threshold = degradation_threshold
+        self.noise_sigmas = noise_sigmas
+
+        self.drivers: Dict[str, DriverStintState] = {}
+        self.lap_stats: Dict[tuple, LapTimeStats] = {}  # (driver, compound) -> statistik lap time
+        self.conditions: Optional[RaceConditions] = None
+        self._last_predicted: Dict[str, tuple] = {}  # driver -> (stint, degradation)
+
+        self.metrics = {name: StageMetrics(name) for name in ('ingest', 'stint', 'recommend', 'end_to_end')}
+
+    def _conditions_changed(self, record: LapRecord) -> bool:
+        if self.conditions is None:
+            return True
+        return (abs(record.track_temp - self.conditions.track_temp) >= self.temp_threshold
+                or abs(record.air_temp - self.conditions.air_temp) >= self.temp_threshold
+                or record.rainfall != self.conditions.rainfall)
+
+    def _update_driver(self, record: LapRecord) -> DriverStintState:
+        state = self.drivers.get(record.driver)
+        if state is None or state.stint != record.stint:
+            state = DriverStintState(record.driver, record.stint, record.compound, 0, 0)
+            self.drivers[record.driver] = state
+
+        state.tyre_age = record.tyre_life
+        state.lap_number = record.lap_number
+        if not (math.isfinite(record.lap_time) and 0 < record.lap_time < MAX_LAP_TIME):
+            return state  # Lap tanpa timing valid tidak ikut statistik (sama seperti data training)
+
+        state.fit.add(record.tyre_life, record.lap_time)
+        if state.fit.n >= self.min_fit_laps:
+            state.degradation, state.degradation_stderr = state.fit.estimate()
+
+        if state.first_lap_time is None:
+            state.first_lap_time = record.lap_time
+        state.tyre_degradation = ((record.lap_time - state.first_lap_time) / record.tyre_life
+                                  if record.tyre_life > 0 else 0.0)
+
+        stats = self.lap_stats.setdefault((record.driver, record.compound), LapTimeStats())
+        stats.add(record.lap_time)
+        state.management_score = 1 / (1 + stats.std)
+        return state
+
+    def _driver_changed(self, state: DriverStintState) -> bool:
+        last = self._last_predicted.get(state.driver)
+        threshold = max(self.degradation_threshold, self.noise_sigmas * state.degradation_stderr)
+        return (last is None or last[0] != state.stint
+                or abs(state.degradation - last[1]) >= threshold)
+
+    async def _ingest(self, source: AsyncIterator[Dict], out: asyncio.Queue):
+        async for raw in source:
+            started = time.perf_counter()
+            try:
+                record = LapRecord.from_dict(raw)
+            except (KeyError, TypeError, ValueError):
+                continue  # Lap tanpa data stint/timing lengkap (mis. NaN dari feed)
+            record.received_at = started
+            self.metrics['ingest'].record(time.perf_counter() - started)
+            await out.put(record)
+        await out.put(self._DONE)
+
+    async def _track_stints(self, inbox: asyncio.Queue, out: asyncio.Queue):
+        while (record := await inbox.get()) is not self._DONE:
+            started = time.perf_counter()
+            events = []
+
+            if self._conditions_changed(record):
+                self.conditions = RaceConditions(
+                    total_race_laps=self.total_race_laps,
+                    track_temp=record.track_temp,
+                    air_temp=record.air_temp,
+                    humidity=record.humidity,
+                    tyre_severity=self.tyre_severity,
+                    rainfall=record.rainfall
+                )
+                events.append(('conditions', None))
+
+            state = self._update_driver(record)
+            if self.model is not None and self._driver_changed(state):
+                self._last_predicted[state.driver] = (state.stint, state.degradation)
+                snapshot = dataclasses.replace(state, fit=dataclasses.replace(state.fit))
+                events.append(('driver', snapshot))
+
+            # RaceConditions tidak pernah diubah in-place, jadi referensi ini adalah snapshot
+            # kondisi pada lap ini, walaupun tracker sudah jalan di depan recommender
+            conditions = self.conditions
+            self.metrics['stint'].record(time.perf_counter() - started)
+            for kind, payload in events:
+                await out.put((kind, payload, conditions, record))
+        await out.put(self._DONE)
+
+    async def _recommend(self, inbox: asyncio.Queue, out: asyncio.Queue):
+        while (item := await inbox.get()) is not self._DONE:
+            kind, state, conditions, record = item
+            started = time.perf_counter()
+
+            if kind == 'conditions':
+                update = StrategyUpdate(
+                    kind=kind,
+                    lap_number=record.lap_number,
+                    conditions=conditions,
+                    strategies=self.engine.generate_strategies(
+                        total_race_laps=conditions.total_race_laps,
+                        track_temp=conditions.track_temp,
+                        air_temp=conditions.air_temp,
+                        tyre_severity=conditions.tyre_severity,
+                        rainfall=conditions.rainfall,
+                        circuit=self.circuit
+                    )
+                )
+            else:
+                compound, confidence = self.model.predict(state, conditions)
+                update = StrategyUpdate(
+                    kind=kind,
+                    lap_number=record.lap_number,
+                    conditions=conditions,
+                    driver_state=state,
+                    recommended_compound=compound,
+                    compound_confidence=confidence
+                )
+
+            finished = time.perf_counter()
+            update.latency = finished - record.received_at
+            self.metrics['recommend'].record(finished - started)
+            self.metrics['end_to_end'].record(update.latency)
+            await out.put(update)
+        await out.put(self._DONE)
+
+    async def run(self, source: AsyncIterator[Dict]) -> AsyncIterator[StrategyUpdate]:
+        """Jalankan pipeline dan yield StrategyUpdate sampai source habis"""
+        records = asyncio.Queue(maxsize=self.queue_size)
+        events = asyncio.Queue(maxsize=self.queue_size)
+        updates = asyncio.Queue(maxsize=self.queue_size)
+
+        tasks = [
+            asyncio.create_task(self._ingest(source, records)),
+            asyncio.create_task(self._track_stints(records, events)),
+            asyncio.create_task(self._recommend(events, updates))
+        ]
+        running = set(tasks)
+        getter = None
+        try:
+            while True:
+                if updates.empty():
+                    # Tunggu update atau stage yang selesai; exception stage di-raise di sini,
+                    # kalau tidak stage berikutnya tidak pernah menerima _DONE dan feed macet
+                    getter = asyncio.ensure_future(updates.get())
+                    while not getter.done():
+                        done, _ = await asyncio.wait(running | {getter}, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done - {getter}:
+                            running.discard(task)
+                            task.result()
+                    update = getter.result()
+                else:
+                    update = updates.get_nowait()
+                if update is self._DONE:
+                    break
+                yield update
+            await asyncio.gather(*tasks)
+        finally:
+            if getter is not None:
+                getter.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def metrics_summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: metric.summary() for name, metric in self.metrics.items()}
+
+
+async def _main(args):
+    race = load_replay_race(args.replay, args.year, args.round)
+    # Default dari race yang di-replay dan baris circuit di track_characteristics.csv,
+    # supaya engine dan model memakai severity yang sama
+    circuit = args.circuit or (race['Country'].iloc[0] if 'Country' in race.columns and len(race) else None)
+    total_laps = args.laps or int(race['LapNumber'].max())
+    severity = args.severity or load_track(circuit)['TyreSeverity']
+
+    source = replay_file(args.replay, speed=args.speed or None, year=args.year, round_num=args.round)
+    model = LiveCompoundModel.load(circuit) if args.with_model else None
+    pipeline = LiveStrategyPipeline(total_laps, severity, model=model, circuit=circuit)
+    print(f"{circuit or 'Unknown circuit'} | {total_laps} laps | severity {severity}")
+
+    async for update in pipeline.run(source):
+        if update.kind == 'conditions':
+            top = update.strategies[0] if update.strategies else None
+            print(f"Lap {update.lap_number:2d} | Track {update.conditions.track_temp:.1f}°C "
+                  f"{'🌧️' if update.conditions.rainfall else '☀️'} → "
+                  f"{top.strategy_name if top else 'no strategy'}")
+        elif args.verbose:
+            state = update.driver_state
+            print(f"Lap {update.lap_number:2d} | {state.driver} {state.compound} age {state.tyre_age} "
+                  f"deg {state.degradation:+.3f}s/lap → {update.recommended_compound} "
+                  f"({update.compound_confidence:.0%})")
+
+    print("\nStage latency:")
+    for name, summary in pipeline.metrics_summary().items():
+        print(f"  {name:<11} n={summary['count']:<6} mean {summary['mean_ms']:.3f}ms "
+              f"p95 {summary['p95_ms']:.3f}ms max {summary['max_ms']:.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a race through the live strategy pipeline")
+    parser.add_argument('replay', help="Lap data CSV (format data/f1_tyre_data.csv)")
+    parser.add_argument('--year', type=int, default=None)
+    parser.add_argument('--round', type=int, default=None)
+    parser.add_argument('--laps', type=int, default=None, help="Default: last lap in the replayed race")
+    parser.add_argument('--severity', default=None, choices=['low', 'medium', 'high'],
+                        help="Default: the circuit's TyreSeverity in track_characteristics.csv")
+    parser.add_argument('--circuit', default=None, help="Default: Country of the replayed race")
+    parser.add_argument('--speed', type=float, default=50.0, help="Replay speed (0 = as fast as possible)")
+    parser.add_argument('--with-model', action='store_true')
+    parser.add_argument('--verbose', action='store_true')
+    asyncio.run(_main(parser.parse_args()))
@@ -3,10 +3,13 @@ F1 Pit Stop Strategy Recommender
 Rekomendasi strategi pit stop lengkap: jumlah pit, compound per stint, timing pit stop
 """
 
+import os
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+TRACK_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'track_characteristics.csv')
 
 @dataclass
 class StintPlan:
@@ -29,10 +32,33 @@ class PitStopStrategy:
     confidence_score: float
     reasoning: str
 
+@dataclass
+class LapTimeTable:
+    """Tabel lap time untuk satu (circuit, jumlah lap), dihitung sekali per kombinasi"""
+    base_lap_time: float  # Lap time tanpa fuel & degradasi (seconds)
+    fuel_time: List[float]  # fuel_time[n] = total efek fuel lap 1..n (prefix sum), sebelum faktor pace compound
+    
+    def fuel_between(self, start_lap: int, n_laps: int) -> float:
+        """Total efek fuel untuk lap start_lap .. start_lap + n_laps - 1"""
+        return self.fuel_time[start_lap - 1 + n_laps] - self.fuel_time[start_lap - 1]
+
 class F1PitStopStrategyEngine:
     """Engine untuk generate strategi pit stop optimal"""
     
-    def __init__(self):
+    def __init__(self, history_index=None, track_data_path: str = TRACK_DATA_PATH):
+        # Optional StrategyIndex (strategy_index.py) untuk strategi historis yang mirip
+        self.history_index = history_index
+        
+        # Track length per circuit (km) untuk base lap time
+        if os.path.exists(track_data_path):
+            tracks = pd.read_csv(track_data_path)
+            self.track_lengths = dict(zip(tracks['Country'], tracks['TrackLength']))
+        else:
+            self.track_lengths = {}
+        # Lookup circuit tidak case-sensitive ("monaco" -> "Monaco")
+        self._circuit_names = {name.casefold(): name for name in self.track_lengths}
+        self._lap_tables: Dict[Tuple[Optional[str], int], LapTimeTable] = {}
+        
         # Tire compound characteristics
         self.compound_degradation = {
             'SOFT': 0.08,      # Degradasi per lap (8%)
@@ -60,13 +86,23 @@ class F1PitStopStrategyEngine:
         
         # Pit stop time loss (seconds)
         self.pit_stop_time_loss = 22  # ~20s pit + 2s in/out lap loss
+        
+        # Base lap time = intercept + seconds per km track length
+        self.default_base_lap_time = 90.0  # Circuit tidak dikenal
+        self.base_lap_time_intercept = 30.0
+        self.base_lap_time_per_km = 11.5
+        
+        # Fuel: start penuh, terbakar rata per lap, tiap kg menambah lap time
+        self.fuel_start_mass = 110.0  # kg
+        self.fuel_effect_per_kg = 0.03  # seconds per kg
     
     def generate_strategies(self, 
                           total_race_laps: int,
                           track_temp: float,
                           air_temp: float,
                           tyre_severity: str,  # 'low', 'medium', 'high'
-                          rainfall: bool
+                          rainfall: bool,
+                          circuit: Optional[str] = None  # Country di track_characteristics.csv
                           ) -> List[PitStopStrategy]:
         """
         Generate multiple pit stop strategy options
@@ -74,11 +110,12 @@ class F1PitStopStrategyEngine:
         Returns list of strategies ranked by confidence
         """
         strategies = []
+        lap_table = self.lap_time_table(circuit, total_race_laps)
         
         # Determine available compounds based on conditions
         if rainfall:
             # Wet conditions - simple strategy
-            strategies.append(self._generate_wet_strategy(total_race_laps, tyre_severity))
+            strategies.append(self._generate_wet_strategy(total_race_laps, tyre_severity, lap_table))
             return strategies
         
         # Dry conditions - generate multiple strategies
@@ -86,21 +123,21 @@ class F1PitStopStrategyEngine:
         
         # 1. ONE-STOP STRATEGY
         one_stop = self._generate_one_stop(
-            total_race_laps, track_temp, air_temp, tyre_severity
+            total_race_laps, track_temp, air_temp, tyre_severity, lap_table
         )
         if one_stop:
             strategies.append(one_stop)
         
         # 2. TWO-STOP STRATEGY
         two_stop = self._generate_two_stop(
-            total_race_laps, track_temp, air_temp, tyre_severity
+            total_race_laps, track_temp, air_temp, tyre_severity, lap_table
         )
         if two_stop:
             strategies.append(two_stop)
         
         # 3. THREE-STOP STRATEGY (aggressive)
         three_stop = self._generate_three_stop(
-            total_race_laps, track_temp, air_temp, tyre_severity
+            total_race_laps, track_temp, air_temp, tyre_severity, lap_table
         )
         if three_stop:
             strategies.append(three_stop)
@@ -110,7 +147,42 @@ class F1PitStopStrategyEngine:
         
         return strategies
     
-    def _generate_one_stop(self, total_laps, track_temp, air_temp, severity) -> PitStopStrategy:
+    def find_similar_strategies(self,
+                                total_race_laps: int,
+                                track_temp: float,
+                                air_temp: float,
+                                tyre_severity: str,
+                                rainfall: bool,
+                                k: int = 5) -> list:
+        """
+        Strategi nyata dari race historis dengan kondisi paling mirip
+        
+        Returns list HistoricalStrategy (kosong jika engine dibuat tanpa history_index)
+        """
+        if self.history_index is None:
+            return []
+        return self.history_index.query(
+            total_race_laps, track_temp, air_temp, tyre_severity, rainfall, k=k
+        )
+    
+    def generate_strategies_with_history(self,
+                                         total_race_laps: int,
+                                         track_temp: float,
+                                         air_temp: float,
+                                         tyre_severity: str,
+                                         rainfall: bool,
+                                         circuit: Optional[str] = None,
+                                         k: int = 5) -> Tuple[List[PitStopStrategy], list]:
+        """Generate strategies plus the k most similar historical strategies"""
+        strategies = self.generate_strategies(
+            total_race_laps, track_temp, air_temp, tyre_severity, rainfall, circuit
+        )
+        history = self.find_similar_strategies(
+            total_race_laps, track_temp, air_temp, tyre_severity, rainfall, k=k
+        )
+        return strategies, history
+    
+    def _generate_one_stop(self, total_laps, track_temp, air_temp, severity, lap_table=None) -> PitStopStrategy:
         """Generate optimal one-stop strategy"""
         
         # More sensitive compound selection based on temperature
@@ -182,7 +254,7 @@ class F1PitStopStrategyEngine:
         ]
         
         # Calculate estimated race time
-        estimated_time = self._calculate_race_time(stint_plans, 1)
+        estimated_time = self._calculate_race_time(stint_plans, 1, lap_table)
         
         # Determine risk level
         if stint2_laps > max_laps_stint2 * 0.9:
@@ -209,7 +281,7 @@ class F1PitStopStrategyEngine:
             reasoning=reasoning
         )
     
-    def _generate_two_stop(self, total_laps, track_temp, air_temp, severity) -> PitStopStrategy:
+    def _generate_two_stop(self, total_laps, track_temp, air_temp, severity, lap_table=None) -> PitStopStrategy:
         """Generate optimal two-stop strategy"""
         
         # More granular compound selection
@@ -265,7 +337,7 @@ class F1PitStopStrategyEngine:
             StintPlan(3, compounds[2], pit2_lap + 1, total_laps, total_laps - pit2_lap, 0)
         ]
         
-        estimated_time = self._calculate_race_time(stint_plans, 2)
+        estimated_time = self._calculate_race_time(stint_plans, 2, lap_table)
         
         # Two-stop usually lower risk (fresher tyres)
         risk = "Medium"
@@ -286,7 +358,7 @@ class F1PitStopStrategyEngine:
             reasoning=reasoning
         )
     
-    def _generate_three_stop(self, total_laps, track_temp, air_temp, severity) -> PitStopStrategy:
+    def _generate_three_stop(self, total_laps, track_temp, air_temp, severity, lap_table=None) -> PitStopStrategy:
         """Generate aggressive three-stop strategy"""
         
         # Very aggressive - maximize pace with fresh tyres
@@ -321,7 +393,7 @@ class F1PitStopStrategyEngine:
             StintPlan(4, compounds[3], pit3_lap + 1, total_laps, total_laps - pit3_lap, 0)
         ]
         
-        estimated_time = self._calculate_race_time(stint_plans, 3)
+        estimated_time = self._calculate_race_time(stint_plans, 3, lap_table)
         
         risk = "High"
         confidence = 0.72
@@ -341,7 +413,7 @@ class F1PitStopStrategyEngine:
             reasoning=reasoning
         )
     
-    def _generate_wet_strategy(self, total_laps, severity) -> PitStopStrategy:
+    def _generate_wet_strategy(self, total_laps, severity, lap_table=None) -> PitStopStrategy:
         """Generate strategy for wet conditions"""
         
         # Simple wet strategy - INTERMEDIATE throughout or WET if heavy rain
@@ -367,7 +439,7 @@ class F1PitStopStrategyEngine:
             pit_stops = 1
             strategy_name = "One-Stop Strategy (Wet)"
         
-        estimated_time = self._calculate_race_time(stint_plans, pit_stops)
+        estimated_time = self._calculate_race_time(stint_plans, pit_stops, lap_table)
         
         reasoning = "Wet conditions detected. Strategy adapts to changing weather. "
         reasoning += "Monitor track conditions for potential switch to slicks."
@@ -382,29 +454,73 @@ class F1PitStopStrategyEngine:
             reasoning=reasoning
         )
     
-    def _calculate_race_time(self, stint_plans: List[StintPlan], num_pit_stops: int) -> float:
-        """Calculate estimated race time in seconds"""
-        
-        # Base lap time (assume 90 seconds average)
-        base_lap_time = 90.0
-        total_time = 0.0
+    def resolve_circuit(self, circuit: Optional[str]) -> Optional[str]:
+        """Nama Country di track_characteristics.csv untuk circuit, atau None jika tidak dikenal"""
+        if not circuit:
+            return None
+        return self._circuit_names.get(circuit.strip().casefold())
+    
+    def lap_time_table(self, circuit: Optional[str], total_laps: int) -> LapTimeTable:
+        """
+        Base lap time circuit + prefix sum efek fuel, di-cache per (circuit, total_laps)
         
-        for stint in stint_plans:
-            compound = stint.compound
-            pace_factor = self.compound_pace[compound]
-            deg_rate = self.compound_degradation[compound]
+        Circuit yang tidak ada di track_characteristics.csv memakai default_base_lap_time
+        (satu entry cache untuk semua circuit tidak dikenal)
+        """
+        key = (self.resolve_circuit(circuit), total_laps)
+        if key not in self._lap_tables:
+            track_length = self.track_lengths.get(key[0])
+            if track_length is None:
+                base_lap_time = self.default_base_lap_time
+            else:
+                base_lap_time = self.base_lap_time_intercept + self.base_lap_time_per_km * track_length
             
-            # Calculate time for this stint with degradation
-            for lap in range(stint.total_laps):
-                # Degradation increases lap time
-                degradation_penalty = deg_rate * lap * 0.1  # 0.1s per lap per % degradation
-                lap_time = (base_lap_time / pace_factor) + degradation_penalty
-                total_time += lap_time
+            # Massa fuel di awal lap ke-n turun linear sampai ~0 di lap terakhir
+            burn_per_lap = self.fuel_start_mass / total_laps
+            fuel_time = [0.0]
+            for lap in range(total_laps):
+                fuel_mass = self.fuel_start_mass - burn_per_lap * lap
+                fuel_time.append(fuel_time[-1] + fuel_mass * self.fuel_effect_per_kg)
+            
+            self._lap_tables[key] = LapTimeTable(base_lap_time, fuel_time)
+        return self._lap_tables[key]
+    
+    def _calculate_race_time(self, stint_plans: List[StintPlan], num_pit_stops: int,
+                             lap_table: Optional[LapTimeTable] = None) -> float:
+        """Calculate estimated race time in seconds"""
+        
+        total_time = sum(
+            self._stint_time(stint.compound, stint.total_laps, start_lap=stint.start_lap, lap_table=lap_table)
+            for stint in stint_plans
+        )
         
         # Add pit stop time
         total_time += num_pit_stops * self.pit_stop_time_loss
         
         return total_time
+    
+    def _stint_time(self, compound: str, n_laps: int, tyre_age: int = 0,
+                    start_lap: int = 1, lap_table: Optional[LapTimeTable] = None) -> float:
+        """
+        Waktu satu stint (seconds), O(1) per stint
+        
+        Lap time = (base + efek fuel lap itu) / pace compound + degradasi, jadi lap berat
+        di awal race lebih mahal di compound yang lebih lambat dan timing pit ikut menentukan.
+        tyre_age: lap yang sudah dipakai set ini sebelum stint dimulai
+        Tanpa lap_table: base lap time default dan tanpa efek fuel
+        """
+        if lap_table is None:
+            return self._tyre_time(compound, n_laps, tyre_age, self.default_base_lap_time)
+        return (self._tyre_time(compound, n_laps, tyre_age, lap_table.base_lap_time)
+                + lap_table.fuel_between(start_lap, n_laps) / self.compound_pace[compound])
+    
+    def _tyre_time(self, compound: str, n_laps: int, tyre_age: int, base_lap_time: float) -> float:
+        """Bagian stint time dari base lap time / pace compound + degradasi (tanpa fuel, tidak bergantung lap ke berapa)"""
+        # Degradation penalty lap ke-k dari umur ban: deg_rate * k * 0.1s,
+        # dijumlahkan untuk k = tyre_age .. tyre_age + n_laps - 1
+        age_sum = n_laps * tyre_age + n_laps * (n_laps - 1) / 2
+        return (n_laps * base_lap_time / self.compound_pace[compound]
+                + self.compound_degradation[compound] * 0.1 * age_sum)
 
 
 def format_strategy_output(strategy: PitStopStrategy) -> str:
@@ -0,0 +1,89 @@
+"""
+F1 Race Feature Partition
+Versi script build_features.ipynb untuk satu (atau beberapa) race baru, dipakai incremental_update.py.
+Year/Round ikut disimpan sebagai kunci waktu untuk validation window
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+
+from race_history import load_lap_data, RACE_KEYS, LAP_DATA_PATH, TRACK_DATA_PATH
+
+# Urutan class LabelEncoder di build_features.ipynb (alfabetis, di-fit pada seluruh dataset).
+# Di-fit ulang pada satu race akan memberi kode yang berbeda, jadi kodenya dikunci di sini.
+TRACK_TYPE_CODES = {'desert': 0, 'permanent': 1, 'street': 2}
+SEVERITY_CODES = {'high': 0, 'low': 1, 'medium': 2}
+STINT_PHASE_CODES = {'early': 0, 'late': 1, 'middle': 2}
+
+FEATURE_COLUMNS = [
+    'AirTemp', 'TrackTemp', 'Humidity', 'Rainfall_Binary',
+    'TrackType_Encoded', 'TyreSeverity_Encoded', 'TotalCorners', 'TrackLength',
+    'LapNumber', 'RaceProgress', 'Stint', 'TyreLife', 'StintPhase_Encoded',
+    'TyreManagementScore', 'TyreDegradation', 'TempCompoundScore'
+]
+
+
+def build_race_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Feature per lap dengan definisi yang sama seperti build_features.ipynb
+
+    TyreManagementScore dihitung dari lap di partisi ini saja (notebook: seluruh dataset).
+    Returns Year, Round + FEATURE_COLUMNS + Compound, baris dengan missing value dibuang
+    """
+    df = df.sort_values(RACE_KEYS + ['Driver', 'Stint', 'LapNumber']).copy()
+
+    # Driver tyre management score (lower std = better management)
+    lap_std = df.groupby(['Driver', 'Compound'])['LapTime'].transform('std')
+    df['TyreManagementScore'] = 1 / (1 + lap_std)
+
+    total_laps = df.groupby(RACE_KEYS + ['Driver'])['LapNumber'].transform('max')
+    df['RaceProgress'] = df['LapNumber'] / total_laps
+    df['StintPhase'] = pd.cut(df['TyreLife'], bins=[0, 5, 15, 100], labels=['early', 'middle', 'late'])
+
+    # Kenaikan lap time per lap umur ban relatif ke lap pertama stint;
+    # stint satu lap berakhir NaN (dan dibuang) seperti di notebook
+    stint = df.groupby(RACE_KEYS + ['Driver', 'Stint'])['LapTime']
+    degradation = np.where(df['TyreLife'] > 0, (df['LapTime'] - stint.transform('first')) / df['TyreLife'], 0.0)
+    df['TyreDegradation'] = pd.Series(degradation, index=df.index).where(stint.transform('size') > 1)
+
+    df['TempCompoundScore'] = 0.0
+    df.loc[df['Compound'] == 'SOFT', 'TempCompoundScore'] = 30 - df['TrackTemp']
+    df.loc[df['Compound'] == 'HARD', 'TempCompoundScore'] = df['TrackTemp'] - 30
+
+    df['TrackType_Encoded'] = df['TrackType'].map(TRACK_TYPE_CODES)
+    df['TyreSeverity_Encoded'] = df['TyreSeverity'].map(SEVERITY_CODES)
+    df['StintPhase_Encoded'] = df['StintPhase'].astype(str).map(STINT_PHASE_CODES)
+    df['Rainfall_Binary'] = df['Rainfall'].astype(int)
+
+    return df[RACE_KEYS + FEATURE_COLUMNS + ['Compound']].dropna().reset_index(drop=True)
+
+
+def build_race_partition(year: int,
+                         round_num: int,
+                         output_path: str,
+                         lap_data_path: str = LAP_DATA_PATH,
+                         track_data_path: str = TRACK_DATA_PATH) -> pd.DataFrame:
+    """Tulis feature partition untuk satu race dari lap data (collect_data.ipynb)"""
+    df = load_lap_data(lap_data_path, track_data_path)
+    df = df[(df['Year'] == year) & (df['Round'] == round_num)]
+    if df.empty:
+        raise ValueError(f"No laps for {year} round {round_num} in {lap_data_path}")
+
+    features = build_race_features(df)
+    features.to_csv(output_path, index=False)
+    return features
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the feature partition of one race for incremental_update.py")
+    parser.add_argument('year', type=int)
+    parser.add_argument('round', type=int)
+    parser.add_argument('--laps', default=LAP_DATA_PATH)
+    parser.add_argument('--tracks', default=TRACK_DATA_PATH)
+    parser.add_argument('--output', default=None, help="Default: data/race_features_<year>_<round>.csv")
+    args = parser.parse_args()
+
+    output = args.output or f"data/race_features_{args.year}_{args.round:02d}.csv"
+    features = build_race_partition(args.year, args.round, output, args.laps, args.tracks)
+    print(f"✓ {len(features):,} feature rows saved to {output}")
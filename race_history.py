@@ -0,0 +1,93 @@
+"""
+F1 Race History
+Load lap data historis (collect_data.ipynb) dan ringkas jadi strategi aktual per driver per race
+"""
+
+import pandas as pd
+import numpy as np
+
+from pit_stop_strategy_engine import TRACK_DATA_PATH
+
+LAP_DATA_PATH = 'data/f1_tyre_data.csv'
+
+RACE_KEYS = ['Year', 'Round']
+DRIVER_RACE_KEYS = ['Year', 'Round', 'Driver']
+
+SEVERITY_LEVELS = {'low': 0, 'medium': 1, 'high': 2}
+
+
+def load_lap_data(lap_data_path: str = LAP_DATA_PATH,
+                  track_data_path: str = TRACK_DATA_PATH) -> pd.DataFrame:
+    """Load lap data dan merge karakteristik track (default sama seperti build_features)"""
+    df = pd.read_csv(lap_data_path)
+    track_df = pd.read_csv(track_data_path)
+
+    df = df.merge(track_df, on='Country', how='left')
+    df['TrackType'] = df['TrackType'].fillna('permanent')
+    df['TyreSeverity'] = df['TyreSeverity'].fillna('medium')
+    df['TotalCorners'] = df['TotalCorners'].fillna(df['TotalCorners'].median())
+    df['TrackLength'] = df['TrackLength'].fillna(df['TrackLength'].median())
+    df['Rainfall'] = df['Rainfall'].astype(bool)
+
+    return df
+
+
+def extract_race_strategies(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Satu baris per driver per race: kondisi, urutan compound, panjang stint, lap pit stop dan hasil
+
+    collect_data membuang lap tanpa LapTime atau > 200 s (mis. lap red flag), jadi lap bisa hilang.
+    Panjang stint dihitung dari rentang LapNumber, bukan jumlah baris. RaceTime hanya diisi jika
+    setiap lap yang diselesaikan punya lap time (Timed); selain itu NaN.
+    Position dihitung dari RaceTime di antara finisher yang Timed; finisher yang tidak Timed
+    tidak punya posisi (NA), driver yang tidak finish diurutkan setelahnya berdasarkan jumlah lap.
+    """
+    df = df.sort_values(DRIVER_RACE_KEYS + ['LapNumber'])
+
+    stints = df.groupby(DRIVER_RACE_KEYS + ['Stint'], sort=False).agg(
+        Compound=('Compound', 'first'),
+        EndLap=('LapNumber', 'max')
+    ).reset_index()
+    # Stint berakhir di EndLap dan dimulai setelah EndLap stint sebelumnya (lap yang hilang tetap dihitung)
+    previous_end = stints.groupby(DRIVER_RACE_KEYS, sort=False)['EndLap'].shift(fill_value=0)
+    stints['StintLaps'] = (stints['EndLap'] - previous_end).astype(int)
+
+    sequences = stints.groupby(DRIVER_RACE_KEYS, sort=False).agg(
+        Compounds=('Compound', tuple),
+        StintLaps=('StintLaps', tuple),
+        PitLaps=('EndLap', lambda laps: tuple(int(lap) for lap in laps.iloc[:-1]))
+    ).reset_index()
+
+    races = df.groupby(DRIVER_RACE_KEYS, sort=False).agg(
+        EventName=('EventName', 'first'),
+        Country=('Country', 'first'),
+        LapsCompleted=('LapNumber', 'max'),
+        TimedLaps=('LapTime', 'count'),
+        RaceTime=('LapTime', 'sum'),
+        AirTemp=('AirTemp', 'mean'),
+        TrackTemp=('TrackTemp', 'mean'),
+        Humidity=('Humidity', 'mean'),
+        Rainfall=('Rainfall', 'max'),
+        TyreSeverity=('TyreSeverity', 'first'),
+        TrackLength=('TrackLength', 'first')
+    ).reset_index()
+
+    races['TotalLaps'] = races.groupby(RACE_KEYS)['LapsCompleted'].transform('max')
+    races['Finished'] = races['LapsCompleted'] == races['TotalLaps']
+    races['Timed'] = races['TimedLaps'] == races['LapsCompleted']
+    races['RaceTime'] = races['RaceTime'].where(races['Timed'])
+
+    # Finisher Timed dulu (RaceTime naik), lalu finisher tanpa race time, lalu non-finisher (lap terbanyak dulu)
+    ranked = races['Finished'] & races['Timed']
+    group = np.select([ranked, races['Finished']], [0, 1], default=2)
+    order_key = np.where(ranked, races['RaceTime'], np.inf)
+    races = races.assign(_group=group, _order=order_key, _laps=-races['LapsCompleted'])
+    races = races.sort_values(RACE_KEYS + ['_group', '_order', '_laps'])
+    races['Position'] = (races.groupby(RACE_KEYS).cumcount() + 1).astype('Int64')
+    races.loc[races['_group'] == 1, 'Position'] = pd.NA
+    races = races.drop(columns=['_group', '_order', '_laps', 'TimedLaps'])
+
+    strategies = races.merge(sequences, on=DRIVER_RACE_KEYS, how='left')
+    strategies['NumPitStops'] = strategies['PitLaps'].apply(len)
+
+    return strategies.reset_index(drop=True)
@@ -0,0 +1,144 @@
+"""
+F1 Historical Strategy Index
+KD-tree atas kondisi race historis (ter-normalisasi) untuk mencari strategi nyata yang paling mirip
+"""
+
+import math
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from sklearn.neighbors import KDTree
+from typing import List, Optional
+
+from race_history import load_lap_data, extract_race_strategies, SEVERITY_LEVELS, LAP_DATA_PATH, TRACK_DATA_PATH
+
+INDEX_PATH = 'model/strategy_index.pkl'
+
+# Urutan dimensi index = urutan input generate_strategies
+CONDITION_COLUMNS = ['TotalLaps', 'TrackTemp', 'AirTemp', 'SeverityLevel', 'RainfallFlag']
+
+# Bobot setelah z-score: kondisi basah/kering harus hampir selalu cocok
+CONDITION_WEIGHTS = np.array([1.0, 1.0, 0.5, 1.0, 3.0])
+
+OVERFETCH = 4  # Ambil k*OVERFETCH kandidat lalu urutkan ulang (jarak, posisi)
+
+
+@dataclass
+class HistoricalStrategy:
+    """Strategi aktual satu driver di satu race historis"""
+    year: int
+    event_name: str
+    country: str
+    driver: str
+    compounds: List[str]
+    stint_laps: List[int]
+    pit_laps: List[int]
+    total_pit_stops: int
+    race_time: Optional[float]   # Total waktu race aktual (seconds); None jika ada lap tanpa lap time
+    position: Optional[int]      # Posisi berdasarkan race time; None jika race time tidak lengkap
+    total_laps: int
+    track_temp: float
+    air_temp: float
+    rainfall: bool
+    distance: float      # Jarak kondisi ke query (ter-normalisasi)
+
+
+class StrategyIndex:
+    """Index nearest-neighbour strategi historis per driver per race"""
+
+    def __init__(self, strategies: pd.DataFrame, leaf_size: int = 20):
+        conditions = self._condition_matrix(strategies)
+        self.mean = conditions.mean(axis=0)
+        self.std = conditions.std(axis=0)
+        self.std[self.std == 0] = 1.0
+        self.weights = CONDITION_WEIGHTS / self.std
+
+        self.tree = KDTree((conditions - self.mean) * self.weights, leaf_size=leaf_size)
+
+        # Record siap pakai supaya query tidak menyentuh pandas
+        self.records = [
+            dict(
+                year=int(row.Year), event_name=row.EventName, country=row.Country,
+                driver=row.Driver, compounds=list(row.Compounds),
+                stint_laps=[int(n) for n in row.StintLaps], pit_laps=list(row.PitLaps),
+                total_pit_stops=int(row.NumPitStops),
+                race_time=float(row.RaceTime) if row.Timed else None,
+                position=None if pd.isna(row.Position) else int(row.Position), total_laps=int(row.TotalLaps),
+                track_temp=float(row.TrackTemp), air_temp=float(row.AirTemp),
+                rainfall=bool(row.Rainfall)
+            )
+            for row in strategies.itertuples(index=False)
+        ]
+
+    @staticmethod
+    def _condition_matrix(strategies: pd.DataFrame) -> np.ndarray:
+        conditions = pd.DataFrame({
+            'TotalLaps': strategies['TotalLaps'],
+            'TrackTemp': strategies['TrackTemp'],
+            'AirTemp': strategies['AirTemp'],
+            'SeverityLevel': strategies['TyreSeverity'].map(SEVERITY_LEVELS).fillna(1),
+            'RainfallFlag': strategies['Rainfall'].astype(float)
+        })
+        return conditions[CONDITION_COLUMNS].to_numpy(dtype=float)
+
+    @classmethod
+    def build(cls,
+              lap_data_path: str = LAP_DATA_PATH,
+              track_data_path: str = TRACK_DATA_PATH,
+              include_unfinished: bool = False) -> 'StrategyIndex':
+        """Build index dari lap data; default hanya driver yang finish"""
+        strategies = extract_race_strategies(load_lap_data(lap_data_path, track_data_path))
+        if not include_unfinished:
+            strategies = strategies[strategies['Finished']]
+        strategies = strategies.dropna(subset=['TrackTemp', 'AirTemp'])
+        return cls(strategies.reset_index(drop=True))
+
+    def save(self, path: str = INDEX_PATH):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str = INDEX_PATH) -> 'StrategyIndex':
+        return joblib.load(path)
+
+    def __len__(self):
+        return len(self.records)
+
+    def query(self,
+              total_race_laps: int,
+              track_temp: float,
+              air_temp: float,
+              tyre_severity: str,
+              rainfall: bool,
+              k: int = 5) -> List[HistoricalStrategy]:
+        """
+        k strategi historis dengan kondisi paling mirip
+
+        Entry berjarak sama (driver di race yang sama) diurutkan berdasarkan posisi finish,
+        driver tanpa posisi (race time tidak lengkap) di belakang
+        """
+        point = np.array([[total_race_laps, track_temp, air_temp,
+                           SEVERITY_LEVELS.get(tyre_severity, 1), float(rainfall)]])
+        n_fetch = min(k * OVERFETCH, len(self.records))
+        distances, indices = self.tree.query((point - self.mean) * self.weights, k=n_fetch)
+
+        candidates = sorted(
+            zip(distances[0], indices[0]),
+            key=lambda item: (round(item[0], 9), self.records[item[1]]['position'] or math.inf)
+        )
+        return [HistoricalStrategy(distance=float(dist), **self.records[idx])
+                for dist, idx in candidates[:k]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build historical strategy index")
+    parser.add_argument('--laps', default=LAP_DATA_PATH)
+    parser.add_argument('--tracks', default=TRACK_DATA_PATH)
+    parser.add_argument('--output', default=INDEX_PATH)
+    parser.add_argument('--include-unfinished', action='store_true')
+    args = parser.parse_args()
+
+    index = StrategyIndex.build(args.laps, args.tracks, args.include_unfinished)
+    index.save(args.output)
+    print(f"✓ Strategy index with {len(index):,} driver-race strategies saved to {args.output}")
@@ -0,0 +1,267 @@
+"""
+F1 Tyre Model Training Pipeline
+Versi script dari train_model.ipynb: matrix ter-scale dan fold CV di-cache ke disk (memmap),
+job model x fold dijalankan paralel lewat process pool
+"""
+
+import os
+import hashlib
+import argparse
+import pandas as pd
+import numpy as np
+import joblib
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.model_selection import train_test_split, StratifiedKFold
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import accuracy_score
+from threadpoolctl import threadpool_limits
+from xgboost import XGBClassifier
+from typing import Dict, List, Optional
+
+from incremental_update import register_artifacts
+
+DATA_PATH = 'data/f1_tyre_features.csv'
+MODEL_DIR = 'model'
+CACHE_DIR = 'data/cache/training'
+
+TEST_SIZE = 0.2
+N_FOLDS = 5
+RANDOM_STATE = 42
+EARLY_STOPPING_FRACTION = 0.1  # Porsi data train untuk early stopping XGBoost
+
+MODEL_NAMES = ['Random Forest', 'Gradient Boosting', 'XGBoost']
+
+# Model yang disimpan sebagai tyre_recommender.pkl: incremental_update.py hanya bisa
+# warm-start XGBoost, jadi model ini yang di-deploy walaupun model lain sedikit lebih akurat
+DEPLOY_MODEL = 'XGBoost'
+
+
+def _build_model(name: str):
+    """Create a fresh, single-threaded estimator (parallelism comes from the pool)"""
+    if name == 'Random Forest':
+        # Tidak ada varian histogram / early stopping untuk random forest
+        return RandomForestClassifier(
+            n_estimators=200,
+            max_depth=20,
+            min_samples_split=10,
+            random_state=RANDOM_STATE,
+            n_jobs=1
+        )
+    if name == 'Gradient Boosting':
+        return HistGradientBoostingClassifier(
+            max_iter=200,
+            max_depth=10,
+            learning_rate=0.1,
+            early_stopping=True,
+            validation_fraction=EARLY_STOPPING_FRACTION,
+            n_iter_no_change=10,
+            random_state=RANDOM_STATE
+        )
+    if name == 'XGBoost':
+        return XGBClassifier(
+            n_estimators=500,
+            max_depth=10,
+            learning_rate=0.1,
+            tree_method='hist',
+            early_stopping_rounds=20,
+            random_state=RANDOM_STATE,
+            eval_metric='mlogloss',
+            n_jobs=1
+        )
+    raise ValueError(f"Unknown model: {name}")
+
+
+def _cache_key(data_path: str, test_size: float, n_folds: int, random_state: int) -> str:
+    """Hash isi dataset + parameter split, supaya cache otomatis invalid saat data berubah"""
+    digest = hashlib.sha1()
+    with open(data_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(f"{test_size}:{n_folds}:{random_state}".encode())
+    return digest.hexdigest()[:16]
+
+
+def prepare_training_cache(data_path: str = DATA_PATH,
+                           cache_dir: str = CACHE_DIR,
+                           test_size: float = TEST_SIZE,
+                           n_folds: int = N_FOLDS,
+                           random_state: int = RANDOM_STATE) -> str:
+    """
+    Encode, split, scale dan buat fold CV sekali, lalu simpan sebagai .npy
+
+    Returns path ke direktori cache (dipakai ulang jika dataset tidak berubah)
+    """
+    run_dir = os.path.join(cache_dir, _cache_key(data_path, test_size, n_folds, random_state))
+    meta_path = os.path.join(run_dir, 'meta.pkl')
+    if os.path.exists(meta_path):
+        return run_dir
+
+    os.makedirs(run_dir, exist_ok=True)
+
+    df = pd.read_csv(data_path)
+    X = df.drop('Compound', axis=1)
+    y = df['Compound']
+
+    le_compound = LabelEncoder()
+    y_encoded = le_compound.fit_transform(y)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y_encoded, test_size=test_size, random_state=random_state, stratify=y_encoded
+    )
+
+    scaler = StandardScaler()
+    arrays = {
+        'X_train': scaler.fit_transform(X_train),
+        'X_test': scaler.transform(X_test),
+        'y_train': y_train,
+        'y_test': y_test
+    }
+
+    folds = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    for fold, (train_idx, val_idx) in enumerate(folds.split(arrays['X_train'], y_train)):
+        arrays[f'fold{fold}_train'] = train_idx
+        arrays[f'fold{fold}_val'] = val_idx
+
+    for name, array in arrays.items():
+        np.save(os.path.join(run_dir, f'{name}.npy'), np.ascontiguousarray(array))
+
+    # meta.pkl ditulis terakhir sebagai penanda cache lengkap
+    joblib.dump({
+        'scaler': scaler,
+        'label_encoder': le_compound,
+        'feature_columns': X.columns.tolist(),
+        'n_folds': n_folds
+    }, meta_path)
+
+    return run_dir
+
+
+def _load(run_dir: str, name: str) -> np.ndarray:
+    return np.load(os.path.join(run_dir, f'{name}.npy'), mmap_mode='r')
+
+
+def _fit(model, name: str, X: np.ndarray, y: np.ndarray):
+    """Fit model; XGBoost mendapat eval set terpisah untuk early stopping"""
+    if name != 'XGBoost':
+        model.fit(X, y)
+        return model
+
+    X_fit, X_es, y_fit, y_es = train_test_split(
+        X, y, test_size=EARLY_STOPPING_FRACTION, random_state=RANDOM_STATE, stratify=y
+    )
+    model.fit(X_fit, y_fit, eval_set=[(X_es, y_es)], verbose=False)
+    return model
+
+
+def _run_job(run_dir: str, name: str, fold: Optional[int]) -> Dict:
+    """
+    Satu unit kerja di process pool
+
+    fold=None -> fit di seluruh data train dan evaluasi di test set (model final)
+    fold=k    -> fit di fold k, skor di validation fold k
+    """
+    X_train = _load(run_dir, 'X_train')
+    y_train = _load(run_dir, 'y_train')
+
+    with threadpool_limits(limits=1):
+        model = _build_model(name)
+
+        if fold is None:
+            _fit(model, name, np.asarray(X_train), np.asarray(y_train))
+            y_pred = model.predict(_load(run_dir, 'X_test'))
+            return {
+                'model_name': name,
+                'fold': None,
+                'model': model,
+                'accuracy': accuracy_score(_load(run_dir, 'y_test'), y_pred),
+                'predictions': y_pred
+            }
+
+        train_idx = _load(run_dir, f'fold{fold}_train')
+        val_idx = _load(run_dir, f'fold{fold}_val')
+        _fit(model, name, X_train[train_idx], y_train[train_idx])
+        return {
+            'model_name': name,
+            'fold': fold,
+            'accuracy': accuracy_score(y_train[val_idx], model.predict(X_train[val_idx]))
+        }
+
+
+def train_models(data_path: str = DATA_PATH,
+                 model_dir: str = MODEL_DIR,
+                 cache_dir: str = CACHE_DIR,
+                 model_names: List[str] = None,
+                 max_workers: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Train semua model + CV secara paralel, simpan DEPLOY_MODEL ke model_dir
+
+    Model dengan test accuracy tertinggi tetap ditandai 'best' untuk perbandingan;
+    jika DEPLOY_MODEL tidak ikut di-train, model terbaik yang disimpan.
+    Artifact baru juga didaftarkan sebagai versi aktif di registry incremental_update.
+    Returns dict hasil per model (model, accuracy, cv_mean, cv_std, predictions)
+    """
+    model_names = model_names or MODEL_NAMES
+    run_dir = prepare_training_cache(data_path, cache_dir)
+    meta = joblib.load(os.path.join(run_dir, 'meta.pkl'))
+
+    jobs = [(name, fold) for name in model_names for fold in [None] + list(range(meta['n_folds']))]
+
+    results = {name: {'cv_scores': []} for name in model_names}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_run_job, run_dir, name, fold) for name, fold in jobs]
+        for future in futures:
+            job = future.result()
+            entry = results[job['model_name']]
+            if job['fold'] is None:
+                entry.update(model=job['model'], accuracy=job['accuracy'],
+                             predictions=job['predictions'])
+            else:
+                entry['cv_scores'].append(job['accuracy'])
+
+    for entry in results.values():
+        cv_scores = np.array(entry.pop('cv_scores'))
+        entry['cv_mean'] = cv_scores.mean()
+        entry['cv_std'] = cv_scores.std()
+
+    # Best model (highest test accuracy) - sama seperti notebook, hanya untuk laporan
+    best_model_name = max(results, key=lambda x: results[x]['accuracy'])
+    deployed_name = DEPLOY_MODEL if DEPLOY_MODEL in results else best_model_name
+
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(results[deployed_name]['model'], os.path.join(model_dir, 'tyre_recommender.pkl'))
+    joblib.dump(meta['scaler'], os.path.join(model_dir, 'scaler.pkl'))
+    joblib.dump(meta['label_encoder'], os.path.join(model_dir, 'label_encoder.pkl'))
+    joblib.dump(meta['feature_columns'], os.path.join(model_dir, 'feature_columns.pkl'))
+
+    register_artifacts(model_dir, source=f"train_model.py ({deployed_name})")
+
+    results[best_model_name]['best'] = True
+    results[deployed_name]['deployed'] = True
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train F1 tyre compound models")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    results = train_models(args.data, args.model_dir, args.cache_dir, max_workers=args.workers)
+
+    print("\n" + "="*60)
+    print("MODEL COMPARISON")
+    print("="*60)
+    for name, r in results.items():
+        marker = "🏆" if r.get('best') else "  "
+        deployed = " ← deployed" if r.get('deployed') else ""
+        print(f"{marker} {name:<18} Test: {r['accuracy']:.4f} | "
+              f"CV: {r['cv_mean']:.4f} (+/- {r['cv_std']:.4f}){deployed}")
+
+    print("\nSaved Files:")
+    print(f"  - {args.model_dir}/tyre_recommender.pkl")
+    print(f"  - {args.model_dir}/scaler.pkl")
+    print(f"  - {args.model_dir}/label_encoder.pkl")
+    print(f"  - {args.model_dir}/feature_columns.pkl")
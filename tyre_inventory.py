@@ -0,0 +1,326 @@
+"""
+F1 Tyre Inventory Planner
+Cari urutan stint terbaik dari set ban yang benar-benar tersedia (compound + lap terpakai)
+dengan branch-and-bound di atas race-time model strategy engine
+"""
+
+import math
+import heapq
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from pit_stop_strategy_engine import F1PitStopStrategyEngine, LapTimeTable, PitStopStrategy, StintPlan
+
+DRY_COMPOUNDS = ('SOFT', 'MEDIUM', 'HARD')
+WET_COMPOUNDS = ('INTERMEDIATE', 'WET')
+
+MIN_STINT_LAPS = 5
+MAX_PIT_STOPS = 3
+
+STRATEGY_NAMES = {0: "No-Stop", 1: "One-Stop", 2: "Two-Stop", 3: "Three-Stop"}
+
+
+@dataclass(frozen=True)
+class TyreSet:
+    """Satu set ban dari alokasi weekend"""
+    compound: str
+    laps_used: int = 0  # Lap yang sudah dipakai (mis. dari kualifikasi)
+
+
+@dataclass(frozen=True)
+class _SetType:
+    """Set identik (compound + lap terpakai) digabung supaya search tidak mengulang simetri"""
+    compound: str
+    laps_used: int
+    max_laps: int                  # Sisa umur set untuk severity ini
+    lap_costs: Tuple[float, ...]   # Waktu lap ke-1..max_laps di set ini tanpa fuel (naik karena degradasi)
+    fuel_factor: float             # 1 / pace compound: pengali efek fuel lap di set ini
+
+
+class InventoryStrategyPlanner:
+    """Planner strategi pit stop dengan batasan inventory set ban"""
+
+    def __init__(self,
+                 engine: Optional[F1PitStopStrategyEngine] = None,
+                 min_stint_laps: int = MIN_STINT_LAPS,
+                 max_pit_stops: int = MAX_PIT_STOPS):
+        self.engine = engine or F1PitStopStrategyEngine()
+        self.min_stint_laps = min_stint_laps
+        self.max_pit_stops = max_pit_stops
+
+    def plan(self,
+             total_race_laps: int,
+             tyre_severity: str,
+             tyre_sets: List[TyreSet],
+             rainfall: bool = False,
+             circuit: Optional[str] = None) -> List[PitStopStrategy]:
+        """
+        Strategi tercepat untuk setiap jumlah pit stop yang feasible dengan inventory
+
+        Kondisi kering wajib memakai minimal dua compound slick berbeda.
+        Returns list strategy, diurutkan berdasarkan estimasi race time
+        """
+        allowed = WET_COMPOUNDS if rainfall else DRY_COMPOUNDS
+        lap_table = self.engine.lap_time_table(circuit, total_race_laps)
+        types, counts = self._group_sets(tyre_sets, allowed, tyre_severity, lap_table.base_lap_time)
+        if not types:
+            return []
+
+        strategies = []
+        for pit_stops in range(0 if rainfall else 1, self.max_pit_stops + 1):
+            result = self._search(total_race_laps, types, counts, pit_stops, lap_table,
+                                  require_two_compounds=not rainfall)
+            if result is not None:
+                strategies.append(self._build_strategy(types, result))
+
+        strategies.sort(key=lambda x: x.estimated_race_time)
+        return strategies
+
+    def _group_sets(self, tyre_sets: List[TyreSet], allowed, severity,
+                    base_lap_time: float) -> Tuple[List[_SetType], Tuple[int, ...]]:
+        grouped = Counter((s.compound, s.laps_used) for s in tyre_sets if s.compound in allowed)
+        types = []
+        for (compound, laps_used), count in grouped.items():
+            max_laps = self.engine.compound_max_laps[compound][severity] - laps_used
+            if max_laps < self.min_stint_laps:
+                continue
+            # Selisih _tyre_time(n + 1) - _tyre_time(n) = waktu lap ke-(n + 1) di set ini tanpa fuel;
+            # efek fuel bergantung nomor lap dan dihitung per compound di _allocate
+            times = [self.engine._tyre_time(compound, n, laps_used, base_lap_time) for n in range(max_laps + 1)]
+            lap_costs = tuple(b - a for a, b in zip(times, times[1:]))
+            fuel_factor = 1 / self.engine.compound_pace[compound]
+            types.append((_SetType(compound, laps_used, max_laps, lap_costs, fuel_factor), count))
+
+        # Set tercepat dulu supaya incumbent bagus ditemukan lebih awal
+        types.sort(key=lambda item: (item[0].lap_costs[0], item[0].laps_used))
+        return [t for t, _ in types], tuple(c for _, c in types)
+
+    def _greedy(self, chosen: List[_SetType], total_laps: int) -> Tuple[float, List[int]]:
+        """
+        Panjang stint optimal (tanpa fuel) untuk set yang sudah dipilih
+
+        Waktu lap per set naik monoton (degradasi), jadi alokasi greedy lap demi lap ke set
+        dengan waktu lap berikutnya termurah memberi total waktu minimum.
+        Caller menjamin feasible. Returns (waktu tanpa fuel & pit loss, panjang stint per set)
+        """
+        min_stint = self.min_stint_laps
+        lengths = [min_stint] * len(chosen)
+        time = sum(sum(t.lap_costs[:min_stint]) for t in chosen)
+        heap = [(t.lap_costs[min_stint], i) for i, t in enumerate(chosen) if t.max_laps > min_stint]
+        heapq.heapify(heap)
+        for _ in range(total_laps - len(chosen) * min_stint):
+            cost, i = heapq.heappop(heap)
+            time += cost
+            lengths[i] += 1
+            if lengths[i] < chosen[i].max_laps:
+                heapq.heappush(heap, (chosen[i].lap_costs[lengths[i]], i))
+        return time, lengths
+
+    def _group_costs(self, sets: List[_SetType]) -> Tuple[int, List[float]]:
+        """
+        Waktu tyre minimum sekelompok set (satu compound) untuk setiap total lap
+
+        Returns (lap minimum, costs) dengan costs[k] = waktu untuk lap minimum + k lap
+        (marginal greedy = semua marginal tersisa diurutkan, karena tiap set naik monoton)
+        """
+        min_stint = self.min_stint_laps
+        cost = sum(sum(t.lap_costs[:min_stint]) for t in sets)
+        costs = [cost]
+        for marginal in sorted(c for t in sets for c in t.lap_costs[min_stint:]):
+            cost += marginal
+            costs.append(cost)
+        return len(sets) * min_stint, costs
+
+    def _allocate(self, chosen: List[_SetType], total_laps: int,
+                  lap_table: LapTimeTable) -> Optional[Tuple[float, List[Tuple[int, int]]]]:
+        """
+        Urutan dan panjang stint optimal untuk set yang sudah dipilih, termasuk efek fuel
+
+        Efek fuel lap l di set c = fuel(l) * fuel_factor(c) dengan fuel(l) turun tiap lap, jadi
+        compound tercepat (fuel_factor terkecil) selalu di depan (exchange argument). Dengan urutan
+        itu total fuel hanya bergantung pada jumlah lap per compound:
+            fuel_factor_1 * F(L) + sum_k (fuel_factor_k - fuel_factor_k-1) * (F(L) - F(N_1 + .. + N_k-1))
+        Total lap per compound di-enumerasi; di dalam compound, lap dibagi greedy antar set.
+        Returns (waktu tanpa pit loss, [(index di chosen, panjang stint), ...] sesuai urutan stint) atau None
+        """
+        min_stint = self.min_stint_laps
+        if len(chosen) * min_stint > total_laps or sum(t.max_laps for t in chosen) < total_laps:
+            return None
+
+        groups: Dict[str, List[int]] = {}
+        for i, t in enumerate(chosen):
+            groups.setdefault(t.compound, []).append(i)
+        order = sorted(groups, key=lambda c: chosen[groups[c][0]].fuel_factor)
+        factors = [chosen[groups[c][0]].fuel_factor for c in order]
+        group_costs = [self._group_costs([chosen[i] for i in groups[c]]) for c in order]
+
+        fuel_time = lap_table.fuel_time
+        fuel_total = fuel_time[total_laps]
+        best = [math.inf, None]
+
+        def enumerate_totals(k: int, laps_before: int, time: float, totals: List[int]):
+            n_min, costs = group_costs[k]
+            remaining_min = sum(group_costs[j][0] for j in range(k + 1, len(order)))
+            remaining_max = sum(g[0] + len(g[1]) - 1 for g in group_costs[k + 1:])
+            fuel_step = 0.0 if k == 0 else (factors[k] - factors[k - 1]) * (fuel_total - fuel_time[laps_before])
+            if k == len(order) - 1:
+                n = total_laps - laps_before
+                if n_min <= n < n_min + len(costs):
+                    total = time + fuel_step + costs[n - n_min]
+                    if total < best[0]:
+                        best[0], best[1] = total, totals + [n]
+                return
+            low = max(n_min, total_laps - laps_before - remaining_max)
+            high = min(n_min + len(costs) - 1, total_laps - laps_before - remaining_min)
+            for n in range(low, high + 1):
+                enumerate_totals(k + 1, laps_before + n, time + fuel_step + costs[n - n_min], totals + [n])
+
+        enumerate_totals(0, 0, factors[0] * fuel_total, [])
+        if best[1] is None:
+            return None
+
+        path = []
+        for compound, n_laps in zip(order, best[1]):
+            indices = groups[compound]
+            _, lengths = self._greedy([chosen[i] for i in indices], n_laps)
+            path += list(zip(indices, lengths))
+        return best[0], path
+
+    def _lower_bound(self, chosen: List[_SetType], types: List[_SetType], counts: Tuple[int, ...],
+                     first_type: int, slots: int, total_laps: int, fuel_total: float) -> float:
+        """
+        Lower bound waktu race untuk set terpilih + slots set lagi (type >= first_type)
+
+        Relaksasi: setiap set terpilih wajib min stint, sisa lap diisi dari waktu lap termurah
+        semua set yang masih mungkin dipakai (tanpa batas jumlah set tambahan); semua lap
+        mendapat fuel_factor terkecil.
+        Returns math.inf jika umur set tidak cukup untuk menyelesaikan race
+        """
+        min_stint = self.min_stint_laps
+        available = [t for i in range(first_type, len(types)) for t in [types[i]] * min(counts[i], slots)]
+        reach = sum(t.max_laps for t in chosen) + sum(sorted((t.max_laps for t in available), reverse=True)[:slots])
+        if reach < total_laps:
+            return math.inf
+
+        bound = sum(sum(t.lap_costs[:min_stint]) for t in chosen)
+        remaining = total_laps - len(chosen) * min_stint
+        pool = [c for t in chosen for c in t.lap_costs[min_stint:]]
+        pool += [c for t in available for c in t.lap_costs]
+        fuel = min(t.fuel_factor for t in chosen + available) * fuel_total
+        return bound + sum(heapq.nsmallest(remaining, pool)) + fuel
+
+    def _search(self, total_laps: int, types: List[_SetType], counts: Tuple[int, ...],
+                pit_stops: int, lap_table: LapTimeTable,
+                require_two_compounds: bool) -> Optional[Tuple[float, List[Tuple[int, int]]]]:
+        """
+        Branch-and-bound atas pilihan set untuk tepat pit_stops stop
+
+        Urutan stint optimal ditentukan _allocate (compound tercepat dulu), jadi yang dicari
+        adalah multiset set (index type tidak turun).
+        Branch dipangkas jika tidak feasible atau lower bound-nya >= solusi terbaik.
+        Returns (waktu tanpa pit loss, [(index set type, panjang stint), ...] sesuai urutan stint) atau None
+        """
+        n_stints = pit_stops + 1
+        fuel_total = lap_table.fuel_time[total_laps]
+        best = [math.inf, None]
+
+        def branch(first_type: int, counts: Tuple[int, ...], chosen: List[int]):
+            slots = n_stints - len(chosen)
+            chosen_types = [types[i] for i in chosen]
+
+            if slots == 0:
+                if require_two_compounds and len({t.compound for t in chosen_types}) < 2:
+                    return
+                if len(chosen) * self.min_stint_laps > total_laps or sum(t.max_laps for t in chosen_types) < total_laps:
+                    return
+                # Bound murah dulu: optimum tanpa batasan urutan + fuel dengan fuel_factor terkecil
+                free_time, _ = self._greedy(chosen_types, total_laps)
+                if free_time + min(t.fuel_factor for t in chosen_types) * fuel_total >= best[0]:
+                    return
+                result = self._allocate(chosen_types, total_laps, lap_table)
+                if result is not None and result[0] < best[0]:
+                    best[0], best[1] = result[0], [(chosen[i], n_laps) for i, n_laps in result[1]]
+                return
+
+            if self._lower_bound(chosen_types, types, counts, first_type, slots, total_laps, fuel_total) >= best[0]:
+                return
+
+            for i in range(first_type, len(types)):
+                if counts[i]:
+                    new_counts = counts[:i] + (counts[i] - 1,) + counts[i + 1:]
+                    branch(i, new_counts, chosen + [i])
+
+        branch(0, counts, [])
+        if best[1] is None:
+            return None
+        return best[0], best[1]
+
+    def _build_strategy(self, types: List[_SetType], result: Tuple[float, List[Tuple[int, int]]]) -> PitStopStrategy:
+        stint_time, path = result
+        pit_stops = len(path) - 1
+
+        stint_plans = []
+        set_notes = []
+        lap = 0
+        max_wear = 0.0
+        for number, (i, n_laps) in enumerate(path, 1):
+            set_type = types[i]
+            end_lap = lap + n_laps
+            stint_plans.append(StintPlan(
+                stint_number=number,
+                compound=set_type.compound,
+                start_lap=lap + 1,
+                end_lap=end_lap,
+                total_laps=n_laps,
+                pit_after_lap=end_lap if number < len(path) else 0
+            ))
+            used = f"{set_type.laps_used}-lap used" if set_type.laps_used else "new"
+            set_notes.append(f"{set_type.compound} ({used} set, {n_laps} laps)")
+            max_wear = max(max_wear, n_laps / set_type.max_laps)
+            lap = end_lap
+
+        # _calculate_race_time menganggap semua set baru, jadi pakai waktu dari search (sudah termasuk fuel)
+        race_time = stint_time + pit_stops * self.engine.pit_stop_time_loss
+
+        # Risk dari stint yang paling dekat ke batas umur set
+        if max_wear > 0.9:
+            risk, confidence = "High", 0.70
+        elif max_wear > 0.8:
+            risk, confidence = "Medium", 0.85
+        else:
+            risk, confidence = "Low", 0.90
+
+        reasoning = f"Fastest {pit_stops}-stop plan with the available sets: {' → '.join(set_notes)}. "
+        if pit_stops:
+            reasoning += f"Pit stops at lap {', '.join(str(s.pit_after_lap) for s in stint_plans[:-1])}."
+
+        return PitStopStrategy(
+            strategy_name=f"{STRATEGY_NAMES.get(pit_stops, f'{pit_stops}-Stop')} Strategy (Inventory)",
+            total_pit_stops=pit_stops,
+            stint_plans=stint_plans,
+            estimated_race_time=race_time,
+            risk_level=risk,
+            confidence_score=confidence,
+            reasoning=reasoning
+        )
+
+
+# Example usage
+if __name__ == "__main__":
+    from pit_stop_strategy_engine import format_strategy_output
+
+    # Alokasi weekend tipikal setelah kualifikasi
+    inventory = (
+        [TyreSet('SOFT', 3)] * 3 + [TyreSet('SOFT', 6)] * 2 + [TyreSet('SOFT')] * 3
+        + [TyreSet('MEDIUM', 4)] + [TyreSet('MEDIUM')] * 2
+        + [TyreSet('HARD')] * 2
+    )
+
+    planner = InventoryStrategyPlanner()
+    strategies = planner.plan(total_race_laps=58, tyre_severity='medium', tyre_sets=inventory)
+
+    print("\n🏎️ F1 INVENTORY-AWARE STRATEGY PLAN")
+    print(f"Race: 58 laps | Severity: Medium | Sets: {len(inventory)}")
+    for strategy in strategies:
+        print(format_strategy_output(strategy))